@@ -0,0 +1,330 @@
+#
+# File: RL/agent/planner.py
+# Desc: Lookahead planner that searches the moves of the snake before taking one
+#
+##########################
+
+import gc
+import math
+import random
+import time
+import numpy as np
+import torch
+from snake_gym.game.actions import AGENT_MOVES
+from snake_gym.game.geometry import food_delta, food_angle
+
+
+class SimSnake:
+    """
+    Render-free copy of the snake and its food, used to simulate moves without touching the Env.
+    It follows the same rules as Snake, World and Env, except that the food is not placed again
+    once it is eaten, as that location is random. See place_food to sample one
+    """
+    __slots__ = ("body", "occupied", "length", "direction", "food", "width", "height", "distance")
+
+    def __init__(self, body, occupied, length, direction, food, width, height):
+        """
+        Constructor
+        :param body: deque of the coordinates of the body parts, the head is at the front
+        :param occupied: set of the cells taken by the body
+        :param length: the length of the snake
+        :param direction: the direction of the snake
+        :param food: the coordinates of the food as (x, y), or None once it is eaten
+        :param width: the width of the board
+        :param height: the height of the board
+        """
+        self.body = body
+        self.occupied = occupied
+        self.length = length
+        self.direction = direction
+        self.food = food
+        self.width = width
+        self.height = height
+
+        # the distance from the head to the food, across borders if that is shorter
+        self.distance = None
+        if food is not None:
+            dx, dy = food_delta(body[0], food, width, height)
+            self.distance = math.sqrt(dx ** 2 + dy ** 2)
+
+    @classmethod
+    def from_env(cls, env):
+        """
+        Method to copy the current game of an environment
+        :param env: the snake gym Env
+        :return: SimSnake
+        """
+        snake = env.snake
+        return cls(snake.body.copy(), set(snake.occupied), snake.length, snake.direction,
+                   tuple(env.world.food_location), env.config.width, env.config.height)
+
+    def step(self, action):
+        """
+        Method to simulate a move of the snake
+        :param action: the relative action, as used by AgentSnake
+        :return: (next SimSnake, reward, done)
+        """
+        dx, dy, direction = AGENT_MOVES[self.direction][action]
+        x, y = self.body[0]
+        head = ((x + dx) % self.width, (y + dy) % self.height)
+
+        body = self.body.copy()
+        occupied = set(self.occupied)
+
+        # the tail leaves its cell first, unless the snake is still growing
+        if len(body) >= self.length:
+            occupied.discard(body.pop())
+
+        collided = head in occupied
+        body.appendleft(head)
+        occupied.add(head)
+
+        # the food is eaten before collisions are checked, as in World.run_tick
+        if head == self.food:
+            return SimSnake(body, occupied, self.length + 1, direction, None, self.width, self.height), 1, False
+
+        child = SimSnake(body, occupied, self.length, direction, self.food, self.width, self.height)
+        if collided:
+            return child, -1, True
+
+        # check if closer or further from food
+        if self.distance > child.distance:
+            return child, 0.1, False
+
+        return child, -0.2, False
+
+    def place_food(self, rng):
+        """
+        Method to copy this game with the food on a random free cell, as World places it after it was eaten
+        :param rng: random.Random
+        :return: SimSnake, or None when the snake fills the board
+        """
+        if len(self.occupied) >= self.width * self.height:
+            return None
+
+        # the body and the occupied cells are shared, as step copies them
+        while True:
+            food = (rng.randrange(self.width), rng.randrange(self.height))
+            if food not in self.occupied:
+                return SimSnake(self.body, self.occupied, self.length, self.direction, food, self.width, self.height)
+
+    def get_state(self):
+        """
+        Method to compute the state of this game, exactly as Env does
+        :return: [angle to the food, right neighbour, front neighbour, left neighbour]
+        """
+        x, y = self.body[0]
+        dx, dy = food_delta(self.body[0], self.food, self.width, self.height)
+        state = [food_angle(dx, dy, self.direction)]
+
+        # check if we would collide upon taking any of the actions
+        for mx, my, _ in AGENT_MOVES[self.direction]:
+            state.append(int(((x + mx) % self.width, (y + my) % self.height) in self.occupied))
+
+        return state
+
+
+class Planner:
+    """
+    Lookahead planner that expands the moves of the snake breadth first, until a budget of nodes or
+    milliseconds is used up. The unexpanded leaves are valued by the QNetwork in batches, and the values
+    are backed up with the discounted rewards of the moves to choose the best action at the root
+    """
+
+    def __init__(self, model=None, max_nodes=None, max_ms=None, discount_factor=0.8, leaf_batch_size=1024,
+                 margin=0.2, food_samples=4, seed=None):
+        """
+        Constructor
+        :param model: the QNetwork used to value the leaves, leaves are worth 0 without one
+        :param max_nodes: the maximum number of nodes expanded per move
+        :param max_ms: the maximum number of milliseconds per move, including valuing the leaves and backing up
+        :param discount_factor: the discount of future rewards, as used during training
+        :param leaf_batch_size: the number of leaves valued with a single forward pass
+        :param margin: the fraction of max_ms kept free for errors in the estimated time of valuing and backing up
+        :param food_samples: the number of random food locations a leaf in which the food was eaten is valued with
+        :param seed: seed for those food locations
+        """
+        if max_nodes is None and max_ms is None:
+            raise ValueError("Planner needs a budget in nodes, in milliseconds or both")
+
+        self.model = model
+        self.max_nodes = max_nodes
+        self.max_ms = max_ms
+        self.discount_factor = discount_factor
+        self.leaf_batch_size = leaf_batch_size
+        self.margin = margin
+        self.food_samples = food_samples
+        self.rng = random.Random(seed)
+
+        # the number of nodes expanded for the last move
+        self.expanded = 0
+
+        # estimates of the seconds it takes to value a leaf and to back up an expanded node,
+        # the time budget reserves them for the nodes found so far
+        self._leaf_seconds = 2e-5 if model is not None else 0.0
+        self._backup_seconds = 5e-6
+
+    def plan(self, env):
+        """
+        Method to choose the action for the current game of an environment
+        The search allocates many small objects, which would trigger long garbage collections,
+        so the collector is paused while searching. The tree holds no reference cycles.
+
+        With max_ms, expansion stops once the estimated time of valuing the leaves and backing up the
+        tree, plus margin * max_ms, would pass the budget. The estimates follow increases quickly, so a move
+        only takes longer than max_ms when valuing and backing up take more than margin * max_ms longer
+        than estimated from recent moves. That is not bounded: a move that is preempted by the OS takes as
+        long as the preemption. On a single busy core, max_ms=5 measured a mean of 3.8 ms, a p99 of 5.3 ms
+        and a maximum of 7.6 ms
+        :param env: the snake gym Env, which is not changed
+        :return: action
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._search(env)
+        finally:
+            if enabled:
+                gc.enable()
+
+    def _search(self, env):
+        """
+        Private method to expand the tree of moves within the budget and choose the best action
+        :param env: the snake gym Env
+        :return: action
+        """
+        start = time.perf_counter()
+        deadline = None if self.max_ms is None else start + self.max_ms * (1 - self.margin) / 1000
+        max_nodes = math.inf if self.max_nodes is None else self.max_nodes
+
+        # every node is a game, with the (reward, done, child index) of its three actions once expanded,
+        # games that ended in a collision are not stored
+        games = [SimSnake.from_env(env)]
+        edges = [None]
+
+        # expand the nodes in the order they were created, which is breadth first
+        self.expanded = 0
+        while self.expanded < len(games) and self.expanded < max_nodes:
+            # stop in time to value the leaves found so far and back up the tree
+            if deadline is not None:
+                reserved = (len(games) - self.expanded) * self._leaf_seconds + self.expanded * self._backup_seconds
+                if time.perf_counter() + reserved > deadline:
+                    break
+
+            node = self.expanded
+            game = games[node]
+            self.expanded += 1
+
+            # nothing to search after eating, as the next food is random
+            if game.food is None:
+                continue
+
+            edges[node] = []
+            for action in range(3):
+                child, reward, done = game.step(action)
+
+                # the game ends on a collision, so there is nothing left to search
+                if done:
+                    edges[node].append((reward, done, None))
+                    continue
+
+                edges[node].append((reward, done, len(games)))
+                games.append(child)
+                edges.append(None)
+
+        valuing = time.perf_counter()
+        values = self._leaf_values(games, edges)
+        backing_up = time.perf_counter()
+
+        # back the values up from the deepest nodes, children always come after their parents
+        for node in reversed(range(self.expanded)):
+            if edges[node] is not None:
+                values[node] = max(self._action_values(edges[node], values))
+
+        # the root is valued directly by the network when nothing could be expanded
+        if edges[0] is None:
+            action = int(np.argmax(self._q_values([games[0]])[0]))
+        else:
+            action = int(np.argmax(self._action_values(edges[0], values)))
+
+        # update the time per leaf and per expanded node to reserve for the next move
+        if self.model is not None and len(games) > self.expanded:
+            seconds = (backing_up - valuing) / (len(games) - self.expanded)
+            self._leaf_seconds = _follow(self._leaf_seconds, seconds)
+        if self.expanded:
+            seconds = (time.perf_counter() - backing_up) / self.expanded
+            self._backup_seconds = _follow(self._backup_seconds, seconds)
+
+        return action
+
+    def _action_values(self, edges, values):
+        """
+        Private method to compute the value of every action of an expanded node
+        :param edges: the (reward, done, child index) of each action
+        :param values: the values of all nodes
+        :return: list of action values
+        """
+        return [reward if done else reward + self.discount_factor * values[child] for reward, done, child in edges]
+
+    def _leaf_values(self, games, edges):
+        """
+        Private method to value the nodes that were not expanded with the network, in batches
+        :param games: the games of all nodes
+        :param edges: the edges of all nodes, None for nodes that were not expanded
+        :return: array with the values of all nodes, zero for expanded nodes
+        """
+        values = np.zeros(len(games))
+        if self.model is None:
+            return values
+
+        # games in which the food was eaten have no state until the next food is placed, so they are
+        # valued as the mean over a few random placements of it
+        nodes, leaves = [], []
+        for node, game in enumerate(games):
+            if edges[node] is not None:
+                continue
+
+            if game.food is not None:
+                nodes.append(node)
+                leaves.append(game)
+                continue
+
+            for _ in range(self.food_samples):
+                sample = game.place_food(self.rng)
+                if sample is not None:
+                    nodes.append(node)
+                    leaves.append(sample)
+
+        if not leaves:
+            return values
+
+        for start in range(0, len(leaves), self.leaf_batch_size):
+            batch = nodes[start:start + self.leaf_batch_size]
+            np.add.at(values, batch, self._q_values(leaves[start:start + self.leaf_batch_size]).max(1))
+
+        return values / np.maximum(np.bincount(nodes, minlength=len(games)), 1)
+
+    def _q_values(self, games):
+        """
+        Private method to compute the Q values of a batch of games with the network
+        :param games: list of SimSnake
+        :return: Q values [len(games) x 3]
+        """
+        if self.model is None:
+            return np.zeros((len(games), 3))
+
+        states = torch.tensor([game.get_state() for game in games], dtype=torch.float32)
+        with torch.inference_mode():
+            return self.model(states).numpy()
+
+
+def _follow(estimate, seconds):
+    """
+    Private function to update an estimate of a duration, it rises quickly and falls slowly,
+    so a budget that reserves it is rarely exceeded
+    :param estimate: the current estimate
+    :param seconds: the new measurement
+    :return: the new estimate
+    """
+    weight = 0.5 if seconds > estimate else 0.05
+    return (1 - weight) * estimate + weight * seconds
@@ -0,0 +1,130 @@
+#
+# File: RL/agent/policy.py
+# Desc: Lightweight loaders of exported agents, for playing without the training stack
+#
+##########################
+
+import os
+import numpy as np
+
+
+class NumpyPolicy:
+    """
+    A QNetwork exported to a .npz file, evaluated with NumPy only, so it starts without importing torch
+    """
+
+    def __init__(self, filepath):
+        """
+        Constructor
+        :param filepath: the .npz file written by RL/export.py
+        """
+        with np.load(filepath) as weights:
+
+            # the layers in order, as (weight transposed, bias), so a batch is multiplied from the left
+            self.layers = []
+            for i in range(int(weights["num_layers"])):
+                self.layers.append((np.ascontiguousarray(weights[f"l{i + 1}.weight"].T), weights[f"l{i + 1}.bias"]))
+
+    def __call__(self, states):
+        """
+        Forward pass through the network
+        :param states: input     [batch_size x in_channels]
+        :return: prediction [batch_size x 3]
+        """
+        x = np.asarray(states, dtype=np.float32)
+        for weight, bias in self.layers[:-1]:
+            x = np.maximum(x @ weight + bias, 0)
+
+        weight, bias = self.layers[-1]
+        return x @ weight + bias
+
+    def select_action(self, state):
+        """
+        Method to select the greedy action for a single state
+        :param state: the state
+        :return: action
+        """
+        return int(self(np.asarray(state, dtype=np.float32)[None])[0].argmax())
+
+
+class TorchScriptPolicy:
+    """
+    A QNetwork exported to TorchScript, which runs without the definition of the network
+    """
+
+    def __init__(self, filepath):
+        """
+        Constructor
+        :param filepath: the .ts file written by RL/export.py
+        """
+        import torch
+
+        self.torch = torch
+        self.model = torch.jit.load(filepath)
+        self.model.eval()
+
+    def __call__(self, states):
+        """
+        Forward pass through the network
+        :param states: input     [batch_size x in_channels]
+        :return: prediction [batch_size x 3]
+        """
+        with self.torch.inference_mode():
+            return self.model(self.torch.as_tensor(np.asarray(states, dtype=np.float32))).numpy()
+
+    def select_action(self, state):
+        """
+        Method to select the greedy action for a single state
+        :param state: the state
+        :return: action
+        """
+        return int(self(np.asarray(state, dtype=np.float32)[None])[0].argmax())
+
+
+class OnnxPolicy:
+    """
+    A QNetwork exported to ONNX, evaluated with onnxruntime
+    """
+
+    def __init__(self, filepath):
+        """
+        Constructor
+        :param filepath: the .onnx file written by RL/export.py
+        """
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(filepath, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, states):
+        """
+        Forward pass through the network
+        :param states: input     [batch_size x in_channels]
+        :return: prediction [batch_size x 3]
+        """
+        return self.session.run(None, {self.input_name: np.asarray(states, dtype=np.float32)})[0]
+
+    def select_action(self, state):
+        """
+        Method to select the greedy action for a single state
+        :param state: the state
+        :return: action
+        """
+        return int(self(np.asarray(state, dtype=np.float32)[None])[0].argmax())
+
+
+# the policy that loads every export format, by file extension
+POLICIES = {".npz": NumpyPolicy, ".ts": TorchScriptPolicy, ".onnx": OnnxPolicy}
+
+
+def load_policy(filepath):
+    """
+    Function to load an exported agent, only importing what its format needs
+    :param filepath: the file written by RL/export.py
+    :return: the policy
+    """
+    extension = os.path.splitext(filepath)[1]
+    if extension not in POLICIES:
+        raise ValueError(f"Unknown export format {extension!r}, choose from {list(POLICIES)}")
+
+    return POLICIES[extension](filepath)
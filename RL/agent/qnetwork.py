@@ -5,6 +5,8 @@
 #
 ##########################
 
+import os
+import time
 import torch
 from torch import nn
 import torch.nn.functional as F
@@ -49,3 +51,119 @@ class QNetwork(nn.Module):
         # load the state dict
         self.load_state_dict(torch.load(filepath))
         self.eval()
+
+
+class ConvQNetwork(nn.Module):
+    """
+    Convolutional deep Q-network for board observations, such as the grid and egocentric observations
+    of snake_gym. The board values (1 snake, 2 food) are split into a body and a food channel per frame
+    """
+
+    def __init__(self, observation_shape, num_hidden=128, channels=(16, 32), wrap=True, channels_last=True):
+        """
+        Constructor
+        :param observation_shape: the shape of a state, (width, height) or (frames, width, height)
+        :param num_hidden: the number of hidden units of the fully connected layer
+        :param channels: the number of channels of the two convolutions
+        :param wrap: whether the convolutions wrap around the borders, as the board does.
+                     Turn off for egocentric windows, which have real edges
+        :param channels_last: whether to store the feature maps channels last, which is faster on CPU
+        """
+        nn.Module.__init__(self)
+        frames = observation_shape[0] if len(observation_shape) == 3 else 1
+        width, height = observation_shape[-2:]
+
+        self.observation_shape = tuple(observation_shape)
+        self.wrap = wrap
+        self.channels_last = channels_last
+
+        # the input is padded once by two cells for both convolutions, which is much cheaper than padding
+        # every feature map. With wrapping this is exactly the same as two circular convolutions
+        self.conv1 = nn.Conv2d(2 * frames, channels[0], 3)
+        self.conv2 = nn.Conv2d(channels[0], channels[1], 3, stride=2)
+        self.l1 = nn.Linear(channels[1] * ((width + 1) // 2) * ((height + 1) // 2), num_hidden)
+        self.l2 = nn.Linear(num_hidden, 3)
+
+        if channels_last:
+            self.to(memory_format=torch.channels_last)
+
+    def forward(self, x):
+        """
+        Forward pass through the network
+        :param x: input     [batch_size x width x height] or [batch_size x frames x width x height]
+        :return: prediction [batch_size x 3]
+        """
+        if x.dim() == 3:
+            x = x.unsqueeze(1)
+
+        x = F.pad(x, (2, 2, 2, 2), mode="circular" if self.wrap else "constant")
+
+        # a body and a food channel for every frame
+        x = torch.cat([x == 1, x == 2], dim=1).float()
+        if self.channels_last:
+            x = x.contiguous(memory_format=torch.channels_last)
+
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = F.relu(self.l1(x.flatten(1)))
+        x = self.l2(x)
+        return x
+
+    def save(self, filename):
+        """
+        Method to save weights into a torch .pt file
+        :param filename: the path and filename to which the model should be stored
+        :return: None
+        """
+        torch.save(self.state_dict(), filename)
+
+    def load(self, filepath):
+        """
+        Method to load pretrained weights into the network
+        :param filepath:
+        :return: None
+        """
+        # load the state dict
+        self.load_state_dict(torch.load(filepath))
+        self.eval()
+
+
+def quantize(model):
+    """
+    Function to create an int8 copy of a trained network for inference on CPU. The weights of the
+    fully connected layers are quantized ahead of time and their activations on the fly, the
+    convolutions stay in float as dynamic quantization does not support them
+    :param model: the trained network
+    :return: the quantized network
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def tune_num_threads(model, states, candidates=None, repeat=50):
+    """
+    Function to find the number of threads with which a network evaluates a batch of states fastest,
+    and to use it from now on. More threads only pay off for large batches and networks
+    :param model: the network
+    :param states: a typical batch of states
+    :param candidates: the numbers of threads to try, defaults to powers of 2 up to the number of cores
+    :param repeat: the number of forward passes to time per candidate
+    :return: the number of threads
+    """
+    if candidates is None:
+        cores = os.cpu_count() or 1
+        candidates = sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+
+    timings = {}
+    with torch.inference_mode():
+        for num_threads in candidates:
+            torch.set_num_threads(num_threads)
+            model(states)
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                model(states)
+            timings[num_threads] = time.perf_counter() - start
+
+    best = min(timings, key=timings.get)
+    torch.set_num_threads(best)
+    return best
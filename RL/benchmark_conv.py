@@ -0,0 +1,77 @@
+#
+# File: RL/benchmark_conv.py
+# Desc: Benchmark of the CPU inference latency of the convolutional Q-network
+#
+#################
+
+import argparse
+import os
+import time
+import numpy as np
+import torch
+from agent.qnetwork import ConvQNetwork, quantize, tune_num_threads
+
+
+def microseconds_per_batch(model, states, repeat):
+    """
+    Function to measure the latency of a forward pass
+    :param model: the network
+    :param states: the batch of states
+    :param repeat: the number of forward passes
+    :return: microseconds per batch
+    """
+    with torch.inference_mode():
+        model(states)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            model(states)
+
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    """
+    Main function printing the microseconds per batch of every variant for every batch size and number of threads
+    """
+    parser = argparse.ArgumentParser(description="Benchmark CPU inference of the ConvQNetwork")
+    parser.add_argument("--width", type=int, default=20)
+    parser.add_argument("--height", type=int, default=15)
+    parser.add_argument("--frames", type=int, default=1)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64, 256, 1024])
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--states", type=int, default=20_000, help="number of states to evaluate per measurement")
+    args = parser.parse_args()
+
+    shape = (args.width, args.height) if args.frames == 1 else (args.frames, args.width, args.height)
+    torch.manual_seed(0)
+    channels_first = ConvQNetwork(shape, channels_last=False).eval()
+    channels_last = ConvQNetwork(shape).eval()
+    channels_last.load_state_dict(channels_first.state_dict())
+    variants = {"fp32": channels_first, "channels last": channels_last, "int8 linear": quantize(channels_last)}
+
+    # random boards with the values of a real game
+    rng = np.random.default_rng(0)
+    boards = torch.from_numpy(rng.choice(3, size=(max(args.batch_sizes),) + shape, p=[0.8, 0.15, 0.05])
+                              .astype(np.float32))
+
+    print(f"board {shape}, microseconds per batch (per state)")
+    print(f"{'threads':>7} {'batch':>6} " + " ".join(f"{name:>22}" for name in variants))
+    for num_threads in args.threads:
+        torch.set_num_threads(num_threads)
+        for batch_size in args.batch_sizes:
+            states = boards[:batch_size]
+            repeat = max(3, args.states // batch_size)
+            timings = [microseconds_per_batch(model, states, repeat) for model in variants.values()]
+
+            print(f"{num_threads:>7} {batch_size:>6} " +
+                  " ".join(f"{t:>12.1f} ({t / batch_size:>7.2f})" for t in timings))
+
+    # the number of threads to use depends on the batch size
+    for batch_size in args.batch_sizes:
+        best = tune_num_threads(channels_last, boards[:batch_size], args.threads, repeat=max(3, 1000 // batch_size))
+        print(f"fastest with {best} thread(s) at batch size {batch_size}")
+
+
+if __name__ == "__main__":
+    main()
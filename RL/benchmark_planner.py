@@ -0,0 +1,80 @@
+#
+# File: RL/benchmark_planner.py
+# Desc: Benchmark of the per-move latency and score of the planner at different budgets
+#
+#################
+
+import argparse
+import os
+import time
+import numpy as np
+from snake_gym import Env
+from agent.planner import Planner
+from agent.qnetwork import QNetwork
+from utils.helpers import select_action
+
+
+def play(policy, seed, max_steps):
+    """
+    Function to play a single episode and time every move
+    :param policy: function from the Env to an action
+    :param seed: seed for the food placement
+    :param max_steps: the episode is cut off after this many steps
+    :return: (score, list of seconds per move)
+    """
+    env = Env(human_player=False, headless=True, seed=seed)
+    score, latencies = 0, []
+
+    env.reset()
+    for _ in range(max_steps):
+        start = time.perf_counter()
+        action = policy(env)
+        latencies.append(time.perf_counter() - start)
+
+        _, reward, done, _, _ = env.step(action)
+        score += reward == 1
+        if done:
+            break
+
+    return score, latencies
+
+
+def main():
+    """
+    Main function printing the latency per move and the score for every budget
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the lookahead planner")
+    parser.add_argument("--checkpoint", default=os.path.dirname(os.path.realpath(__file__)) + "/agent/trained_agent.pt")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 40, 120, 360, 1000])
+    parser.add_argument("--ms", type=float, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--max-steps", type=int, default=1000)
+    args = parser.parse_args()
+
+    # the leaves are only valued by the network when there are trained weights
+    model = None
+    if os.path.isfile(args.checkpoint):
+        model = QNetwork(4, 128)
+        model.load(args.checkpoint)
+
+    policies = {}
+    if model is not None:
+        policies["greedy"] = lambda env: select_action(model, env._state, 0)
+    for nodes in args.nodes:
+        policies[f"{nodes} nodes"] = Planner(model, max_nodes=nodes).plan
+    for ms in args.ms:
+        policies[f"{ms:g} ms"] = Planner(model, max_ms=ms).plan
+
+    print(f"{args.episodes} episodes of at most {args.max_steps} steps, "
+          f"leaves valued by {'the network' if model is not None else 'nothing'}")
+    for name, policy in policies.items():
+        results = [play(policy, seed, args.max_steps) for seed in range(args.episodes)]
+        scores = [score for score, _ in results]
+        latencies = np.concatenate([latencies for _, latencies in results]) * 1000
+
+        print(f"{name:>10}: score {np.mean(scores):6.1f} (min {np.min(scores):3d}), "
+              f"{np.mean(latencies):7.3f} ms/move (p99 {np.percentile(latencies, 99):7.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#
+# File: RL/benchmark_replay.py
+# Desc: Benchmark of the uniform and prioritized replay memories
+#
+#################
+
+import argparse
+import random
+import time
+import numpy as np
+import torch
+from torch import optim
+from snake_gym import Env
+from agent.qnetwork import QNetwork
+from utils.helpers import select_action, get_epsilon
+from utils.memory import ReplayMemory, PrioritizedReplayMemory
+from train import train, PARAMS
+
+
+def fill(memory, state_size, rng):
+    """
+    Function to fill a memory with random transitions
+    :param memory: the replay memory
+    :param state_size: the size of a state
+    :param rng: numpy random generator
+    """
+    states = rng.random((memory.capacity, state_size), dtype=np.float32)
+    for i in range(memory.capacity):
+        memory.push((states[i], i % 3, 0.1, states[i], False))
+
+
+def sample_throughput(memory, batch_size, repeat):
+    """
+    Function to measure how many transitions per second can be sampled as tensors
+    Prioritized memories also get their priorities updated, as happens during training
+    :param memory: the filled replay memory
+    :param batch_size: the batch size
+    :param repeat: the number of batches to sample
+    :return: transitions per second
+    """
+    prioritized = isinstance(memory, PrioritizedReplayMemory)
+    td_errors = np.random.default_rng(0).random(batch_size)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        batch = memory.sample_tensors(batch_size)
+        if prioritized:
+            memory.update_priorities(batch[-1], td_errors)
+
+    return repeat * batch_size / (time.perf_counter() - start)
+
+
+def sample_efficiency(memory, steps, seed):
+    """
+    Function to train an agent for a fixed number of environment steps
+    :param memory: the (empty) replay memory to train with
+    :param steps: the number of environment steps
+    :param seed: seed for the environment and the network
+    :return: (food eaten, collisions) during the second half of training
+    """
+    torch.manual_seed(seed)
+    env = Env(human_player=False, headless=True, seed=seed)
+    rng = random.Random(seed)
+    model = QNetwork(env.get_state_size(), PARAMS.num_hidden)
+    optimizer = optim.Adam(model.parameters(), PARAMS.learn_rate)
+
+    food, collisions = 0, 0
+    state, _ = env.reset()
+    for step in range(steps):
+        action = select_action(model, state, get_epsilon(step), rng)
+        next_state, reward, done, _, _ = env.step(action)
+        memory.push((state, action, reward, next_state, done))
+        train(model, memory, optimizer, PARAMS)
+
+        if step >= steps // 2:
+            food += reward == 1
+            collisions += done
+
+        state = env.reset()[0] if done else next_state
+
+    return food, collisions
+
+
+def main():
+    """
+    Main function printing sample throughput and sample efficiency of both memories
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the replay memories")
+    parser.add_argument("--capacities", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--train-steps", type=int, default=20_000)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    memories = {"uniform": ReplayMemory, "prioritized": PrioritizedReplayMemory}
+
+    print("sample throughput (transitions/sec)")
+    for capacity in args.capacities:
+        for name, memory_class in memories.items():
+            memory = memory_class(capacity, 4)
+            fill(memory, 4, rng)
+            throughput = sample_throughput(memory, args.batch_size, args.repeat)
+            print(f"{name:>12} {capacity:>9}: {throughput:12.0f}")
+
+    print(f"\nsample efficiency (second half of {args.train_steps} steps, mean over seeds {args.seeds})")
+    for name, memory_class in memories.items():
+        results = [sample_efficiency(memory_class(PARAMS.memory_capacity, 4), args.train_steps, seed)
+                   for seed in args.seeds]
+        food, collisions = np.mean(results, axis=0)
+        print(f"{name:>12}: {food:8.1f} food, {collisions:8.1f} collisions")
+
+
+if __name__ == "__main__":
+    main()
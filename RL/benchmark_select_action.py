@@ -0,0 +1,53 @@
+#
+# File: RL/benchmark_select_action.py
+# Desc: Benchmark of single and batched epsilon-greedy action selection
+#
+#################
+
+import argparse
+import time
+import numpy as np
+import torch
+from agent.qnetwork import QNetwork
+from utils.helpers import select_action, select_actions
+
+
+def main():
+    """
+    Main function printing the latency per action of single and batched action selection
+    """
+    parser = argparse.ArgumentParser(description="Benchmark action selection")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024])
+    parser.add_argument("--actions", type=int, default=20_000, help="number of actions to select per measurement")
+    parser.add_argument("--epsilon", type=float, default=0.05)
+    args = parser.parse_args()
+
+    model = QNetwork(4, 128)
+    model.eval()
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch size':>10} {'single (us/action)':>20} {'batched (us/action)':>21}")
+    for batch_size in args.batch_sizes:
+        states = rng.random((batch_size, 4), dtype=np.float32)
+        epsilons = np.full(batch_size, args.epsilon)
+        repeat = max(1, args.actions // batch_size)
+
+        # one forward pass per state
+        start = time.perf_counter()
+        for _ in range(repeat):
+            with torch.no_grad():
+                for state in states:
+                    select_action(model, state, args.epsilon)
+        single = (time.perf_counter() - start) / (repeat * batch_size)
+
+        # one forward pass per batch
+        start = time.perf_counter()
+        for _ in range(repeat):
+            select_actions(model, states, epsilons, rng)
+        batched = (time.perf_counter() - start) / (repeat * batch_size)
+
+        print(f"{batch_size:>10} {single * 1e6:>20.2f} {batched * 1e6:>21.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#
+# File: RL/benchmark_startup.py
+# Desc: Benchmark of the time from a cold process start to the first action of a trained agent
+#
+#################
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from agent.qnetwork import QNetwork
+from export import export_npz, export_torchscript, export_onnx
+
+# every loader plays the first action of a headless game and prints the time it did so
+LOADERS = {
+    "checkpoint (before)": """
+import pygame
+from snake_gym import Env
+from agent.qnetwork import QNetwork
+from utils.helpers import select_action
+env = Env(human_player=False, headless=True)
+model = QNetwork(env.get_state_size(), 128)
+model.load("{base}.pt")
+action = select_action(model, env.reset()[0], 0)
+""",
+    "checkpoint": """
+from snake_gym import Env
+from agent.qnetwork import QNetwork
+from utils.helpers import select_action
+env = Env(human_player=False, headless=True)
+model = QNetwork(env.get_state_size(), 128)
+model.load("{base}.pt")
+action = select_action(model, env.reset()[0], 0)
+""",
+    "torchscript": """
+from snake_gym import Env
+from agent.policy import load_policy
+env = Env(human_player=False, headless=True)
+action = load_policy("{base}.ts").select_action(env.reset()[0])
+""",
+    "npz": """
+from snake_gym import Env
+from agent.policy import load_policy
+env = Env(human_player=False, headless=True)
+action = load_policy("{base}.npz").select_action(env.reset()[0])
+""",
+    "onnx": """
+from snake_gym import Env
+from agent.policy import load_policy
+env = Env(human_player=False, headless=True)
+action = load_policy("{base}.onnx").select_action(env.reset()[0])
+""",
+}
+
+
+def time_to_first_action(code):
+    """
+    Function to start a new Python process and measure the time until it selected its first action
+    :param code: the code the process runs
+    :return: seconds, or None if the process failed
+    """
+    start = time.time()
+    result = subprocess.run([sys.executable, "-c", code + "\nimport time\nprint(time.time())"],
+                            cwd=os.path.dirname(os.path.realpath(__file__)), capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+
+    return float(result.stdout.split()[-1]) - start
+
+
+def main():
+    """
+    Main function printing the time to the first action for every way of loading the agent
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of a trained agent")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        # export an agent to every format, its weights don't matter for the startup time
+        base = os.path.join(directory, "agent")
+        model = QNetwork(4, 128)
+        model.save(base + ".pt")
+        export_npz(model, base + ".npz")
+        export_torchscript(model, base + ".ts", 4)
+        try:
+            export_onnx(model, base + ".onnx", 4)
+        except ImportError:
+            pass
+
+        print(f"cold start to first action, median over {args.repeat} processes")
+        for name, code in LOADERS.items():
+            timings = [time_to_first_action(code.format(base=base)) for _ in range(args.repeat)]
+            if None in timings:
+                print(f"{name:>20}: failed (is the format or its runtime available?)")
+                continue
+
+            print(f"{name:>20}: {np.median(timings) * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#
+# File: RL/benchmark_targets.py
+# Desc: Benchmark of the environment steps needed to reach a score with
+#       vanilla DQN, a target network and Double DQN
+#
+#################
+
+import argparse
+import random
+import time
+from collections import deque
+from types import SimpleNamespace
+import numpy as np
+import torch
+from torch import optim
+from snake_gym import Env
+from agent.qnetwork import QNetwork
+from utils.helpers import select_action, get_epsilon
+from utils.memory import ReplayMemory
+from train import train, create_target_model, sync_target, PARAMS
+
+VARIANTS = {
+    "vanilla": dict(target_update=None, double_dqn=False),
+    "target network": dict(target_update="hard", double_dqn=False),
+    "polyak target": dict(target_update="soft", double_dqn=False),
+    "double dqn": dict(target_update="hard", double_dqn=True),
+}
+
+
+def steps_to_threshold(params, threshold, window, max_steps, seed):
+    """
+    Function to train an agent until its mean score over the last episodes reaches a threshold
+    :param params: the hyperparameters of the experiment
+    :param threshold: the mean number of food per episode to reach
+    :param window: the number of episodes to average the score over
+    :param max_steps: the maximum number of environment steps
+    :param seed: seed for the environment and the network
+    :return: (environment steps, seconds), steps is None if the threshold was not reached
+    """
+    torch.manual_seed(seed)
+    env = Env(human_player=False, headless=True, seed=seed)
+    rng = random.Random(seed)
+    model = QNetwork(env.get_state_size(), params.num_hidden)
+    optimizer = optim.Adam(model.parameters(), params.learn_rate)
+    memory = ReplayMemory(params.memory_capacity, env.get_state_size(), seed=seed)
+    target_model = create_target_model(model, params)
+
+    scores = deque(maxlen=window)
+    score, t, updates = 0, 0, 0
+    state, _ = env.reset()
+
+    start = time.perf_counter()
+    for step in range(max_steps):
+        action = select_action(model, state, get_epsilon(step), rng)
+        next_state, reward, done, _, _ = env.step(action)
+        memory.push((state, action, reward, next_state, done))
+
+        if train(model, memory, optimizer, params, target_model) is not None:
+            updates += 1
+            sync_target(target_model, model, updates, params)
+
+        score += reward == 1
+        t += 1
+        state = next_state
+
+        if done or t == params.max_steps:
+            scores.append(score)
+            if len(scores) == window and np.mean(scores) >= threshold:
+                return step + 1, time.perf_counter() - start
+
+            score, t = 0, 0
+            state, _ = env.reset()
+
+    return None, time.perf_counter() - start
+
+
+def main():
+    """
+    Main function printing the steps and time to reach the threshold for every variant
+    """
+    parser = argparse.ArgumentParser(description="Benchmark target networks and Double DQN")
+    parser.add_argument("--threshold", type=float, default=5)
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--max-steps", type=int, default=100_000)
+    parser.add_argument("--episode-steps", type=int, default=200, help="episodes are cut off after this many steps")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    args = parser.parse_args()
+
+    print(f"steps to a mean score of {args.threshold} over {args.window} episodes, seeds {args.seeds}")
+    for name, overrides in VARIANTS.items():
+        params = SimpleNamespace(**{k: v for k, v in vars(PARAMS).items() if not k.startswith("_")})
+        params.max_steps = args.episode_steps
+        vars(params).update(overrides)
+
+        results = [steps_to_threshold(params, args.threshold, args.window, args.max_steps, seed)
+                   for seed in args.seeds]
+        steps = [s if s is not None else np.nan for s, _ in results]
+        seconds = [s for _, s in results]
+        reached = sum(s is not None for s, _ in results)
+
+        print(f"{name:>15}: {np.nanmean(steps) if reached else float('nan'):10.0f} steps "
+              f"({reached}/{len(results)} reached), {np.mean(seconds):6.1f} s")
+
+
+if __name__ == "__main__":
+    main()
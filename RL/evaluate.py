@@ -0,0 +1,150 @@
+#
+# File: RL/evaluate.py
+# Desc: Headless evaluation of a trained agent over many seeded episodes
+#
+########################
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+import torch
+from snake_gym import VectorEnv
+from agent.qnetwork import QNetwork
+from utils.helpers import select_actions
+
+
+def evaluate_worker(checkpoint, num_episodes, num_envs, max_steps, seed):
+    """
+    Function to play a number of greedy episodes in a single process, with all games batched
+    through the network. Every game plays the same number of episodes, so the results are not
+    biased towards the episodes that happen to end first
+    :param checkpoint: path to the weights of the agent
+    :param num_episodes: the number of episodes to play
+    :param num_envs: the number of games played at once
+    :param max_steps: episodes are cut off after this many steps
+    :param seed: seed for the food placement
+    :return: dict with the scores, lengths and timings
+    """
+    torch.set_num_threads(1)
+
+    num_envs = min(num_envs, num_episodes)
+    env = VectorEnv(num_envs, seed=seed)
+    model = QNetwork(env.get_state_size(), 128)
+    model.load(checkpoint)
+
+    # the number of episodes each game has to play
+    quota = np.full(num_envs, num_episodes // num_envs)
+    quota[:num_episodes % num_envs] += 1
+
+    scores, lengths = [], []
+    played = np.zeros(num_envs, dtype=np.int64)
+    score = np.zeros(num_envs, dtype=np.int64)
+    t = np.zeros(num_envs, dtype=np.int64)
+    timings = {"inference": 0.0, "env step": 0.0, "bookkeeping": 0.0}
+    steps = 0
+
+    states = env.reset()
+    start = time.perf_counter()
+    while (played < quota).any():
+
+        phase = time.perf_counter()
+        actions = select_actions(model, states, 0)
+        timings["inference"] += time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        states, rewards, dones = env.step(actions)
+        timings["env step"] += time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        steps += num_envs
+        score += rewards == 1
+        t += 1
+
+        # cut off the episodes that take too long
+        cut_off = (t == max_steps) & ~dones
+        if cut_off.any():
+            states[cut_off] = env.reset_games(np.flatnonzero(cut_off))
+
+        # only record the episodes of games that did not play their quota yet
+        finished = dones | cut_off
+        record = finished & (played < quota)
+        scores.extend(score[record].tolist())
+        lengths.extend(t[record].tolist())
+        played += finished
+        score[finished] = 0
+        t[finished] = 0
+        timings["bookkeeping"] += time.perf_counter() - phase
+
+    return {"scores": scores, "lengths": lengths, "steps": steps,
+            "seconds": time.perf_counter() - start, "timings": timings}
+
+
+def summarize(values):
+    """
+    Function to describe the distribution of a list of values
+    :param values: the values
+    :return: dict with summary statistics
+    """
+    values = np.asarray(values)
+    return {"mean": float(values.mean()), "std": float(values.std()), "min": int(values.min()),
+            "p5": float(np.percentile(values, 5)), "median": float(np.median(values)),
+            "p95": float(np.percentile(values, 95)), "max": int(values.max())}
+
+
+def main():
+    """
+    Main program that evaluates a trained agent and reports the results
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Evaluate a trained agent headless")
+    parser.add_argument("--checkpoint", default=os.path.dirname(os.path.realpath(__file__)) + "/agent/trained_agent.pt")
+    parser.add_argument("--episodes", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--envs", type=int, default=256, help="number of games batched per worker")
+    parser.add_argument("--max-steps", type=int, default=1000, help="episodes are cut off after this many steps")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.checkpoint):
+        raise RuntimeError(f"No pretrained weights found at: {args.checkpoint}")
+
+    # split the episodes over the workers, each with its own seed
+    workers = max(1, min(args.workers, args.episodes))
+    shares = [args.episodes // workers + (i < args.episodes % workers) for i in range(workers)]
+    jobs = [(args.checkpoint, share, args.envs, args.max_steps, args.seed + i) for i, share in enumerate(shares)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [evaluate_worker(*jobs[0])]
+    else:
+        with mp.get_context("spawn").Pool(workers) as pool:
+            results = pool.starmap(evaluate_worker, jobs)
+    seconds = time.perf_counter() - start
+
+    scores = [s for result in results for s in result["scores"]]
+    lengths = [length for result in results for length in result["lengths"]]
+    steps = sum(result["steps"] for result in results)
+    timings = {phase: sum(result["timings"][phase] for result in results) for phase in results[0]["timings"]}
+
+    report = {"checkpoint": args.checkpoint, "episodes": len(scores), "workers": workers, "seed": args.seed,
+              "score": summarize(scores), "length": summarize(lengths), "steps": steps, "seconds": seconds,
+              "steps_per_second": steps / seconds, "timings": timings}
+
+    print(f"{report['episodes']} episodes on {workers} workers in {seconds:.2f} s "
+          f"({report['steps_per_second']:.0f} steps/sec)")
+    for name in ["score", "length"]:
+        print(f"{name:>8}: " + ", ".join(f"{k} {v:.1f}" for k, v in report[name].items()))
+    for phase, phase_seconds in timings.items():
+        print(f"{phase:>12}: {phase_seconds:7.2f} s ({phase_seconds / steps * 1e6:.2f} us/step)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
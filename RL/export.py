@@ -0,0 +1,105 @@
+#
+# File: RL/export.py
+# Desc: Export of a trained agent to formats that load without the training stack
+#
+########################
+
+import argparse
+import os
+import numpy as np
+import torch
+from agent.qnetwork import QNetwork
+
+FORMATS = ["npz", "torchscript", "onnx"]
+
+
+def export_npz(model, filepath):
+    """
+    Function to write the weights of a QNetwork as NumPy arrays, for agent.policy.NumpyPolicy
+    :param model: the QNetwork
+    :param filepath: the .npz file
+    """
+    weights = {name: tensor.detach().numpy() for name, tensor in model.state_dict().items()}
+    np.savez(filepath, num_layers=len(weights) // 2, **weights)
+
+
+def export_torchscript(model, filepath, state_size):
+    """
+    Function to write a traced QNetwork, for agent.policy.TorchScriptPolicy
+    :param model: the QNetwork
+    :param filepath: the .ts file
+    :param state_size: the size of a state
+    """
+    with torch.no_grad():
+        traced = torch.jit.trace(model, torch.zeros(1, state_size))
+    traced.save(filepath)
+
+
+def export_onnx(model, filepath, state_size):
+    """
+    Function to write a QNetwork to ONNX with a dynamic batch size, for agent.policy.OnnxPolicy
+    :param model: the QNetwork
+    :param filepath: the .onnx file
+    :param state_size: the size of a state
+    """
+    torch.onnx.export(model, (torch.zeros(1, state_size),), filepath, input_names=["state"],
+                      output_names=["q_values"], dynamic_axes={"state": {0: "batch"}, "q_values": {0: "batch"}})
+
+
+def main():
+    """
+    Main program that exports a trained agent and checks every export against the original network
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Export a trained agent")
+    parser.add_argument("--checkpoint", default=os.path.dirname(os.path.realpath(__file__)) + "/agent/trained_agent.pt")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["npz", "torchscript"])
+    parser.add_argument("--state-size", type=int, default=4)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.checkpoint):
+        raise RuntimeError(f"No pretrained weights found at: {args.checkpoint}")
+
+    model = QNetwork(args.state_size, 128)
+    model.load(args.checkpoint)
+
+    # the exports are written next to the checkpoint
+    base = os.path.splitext(args.checkpoint)[0]
+    writers = {
+        "npz": (base + ".npz", lambda path: export_npz(model, path)),
+        "torchscript": (base + ".ts", lambda path: export_torchscript(model, path, args.state_size)),
+        "onnx": (base + ".onnx", lambda path: export_onnx(model, path, args.state_size)),
+    }
+
+    from agent.policy import load_policy
+
+    states = torch.from_numpy(np.random.default_rng(0).uniform(-1, 1, (256, args.state_size)).astype(np.float32))
+    with torch.no_grad():
+        expected = model(states).numpy()
+
+    for name in args.formats:
+        path, write = writers[name]
+
+        # ONNX export needs the optional onnx packages
+        try:
+            write(path)
+        except ImportError as e:
+            print(f"{name:>11}: skipped ({e})")
+            continue
+
+        # every export should give the same Q values as the network it came from
+        try:
+            policy = load_policy(path)
+        except ImportError as e:
+            print(f"{name:>11}: written to {path}, not checked ({e})")
+            continue
+
+        error = np.abs(policy(states.numpy()) - expected).max()
+        if error > 1e-4:
+            raise RuntimeError(f"The {name} export differs from the network by {error}")
+
+        print(f"{name:>11}: written to {path} (max difference {error:.1e})")
+
+
+if __name__ == "__main__":
+    main()
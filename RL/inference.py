@@ -5,25 +5,18 @@
 #
 ########################
 
-import pygame
+import argparse
 import os
 from snake_gym import Env
-from agent.qnetwork import QNetwork
-from utils.helpers import select_action
 
 
-clock = pygame.time.Clock()
-
-
-def main():
+def load_model(in_channels):
     """
-    Main program that loads a pretrained network
-    :return:
+    Function to load the pretrained network, torch is only imported when it is needed
+    :param in_channels: the size of a state
+    :return: QNetwork
     """
-
-    # create board and randomly place food
-    env = Env(human_player=False)
-    in_channels = env.get_state_size()
+    from agent.qnetwork import QNetwork
 
     # create model and load weights
     model = QNetwork(in_channels, 128)
@@ -35,9 +28,47 @@ def main():
 
     # load model
     model.load(filepath)
+    return model
+
+
+def main():
+    """
+    Main program that loads a pretrained network
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Watch a trained agent play")
+    parser.add_argument("--policy", help="agent exported with RL/export.py (.npz, .ts or .onnx) to play with "
+                                         "instead of the checkpoint, a .npz starts without importing torch")
+    parser.add_argument("--plan-nodes", type=int, help="search this many nodes ahead before every move")
+    parser.add_argument("--plan-ms", type=float, help="search this many milliseconds ahead before every move")
+    parser.add_argument("--record", help="record the episode to this file, to play it back with snake_gym.recording")
+    args = parser.parse_args()
+
+    # create board and randomly place food
+    env = Env(human_player=False, record=args.record)
+    planning = args.plan_nodes is not None or args.plan_ms is not None
+
+    # play with an exported agent, or look ahead before every move when given a budget, otherwise play greedily
+    policy, planner, model = None, None, None
+    if args.policy is not None:
+        if planning:
+            raise ValueError("Planning needs the checkpoint, it can't be combined with --policy")
+
+        from agent.policy import load_policy
+        policy = load_policy(args.policy)
+    elif planning:
+        from agent.planner import Planner
+        planner = Planner(load_model(env.get_state_size()), max_nodes=args.plan_nodes, max_ms=args.plan_ms)
+    else:
+        from utils.helpers import select_action
+        model = load_model(env.get_state_size())
+
+    # the window is drawn by pygame, which is imported by the env as soon as it draws
+    import pygame
+    clock = pygame.time.Clock()
 
     # get the first state
-    state = env.reset()
+    state, _ = env.reset()
     done = False
     while not done:
 
@@ -45,8 +76,15 @@ def main():
         clock.tick(10)
 
         # perform a step in the environment
-        action = select_action(model, state, 0)
-        state, reward, done = env.step(action)
+        if policy is not None:
+            action = policy.select_action(state)
+        elif planner is not None:
+            action = planner.plan(env)
+        else:
+            action = select_action(model, state, 0)
+        state, reward, done, _, _ = env.step(action)
+
+    env.close()
 
 
 if __name__ == "__main__":
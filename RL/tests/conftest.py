@@ -0,0 +1,11 @@
+#
+# File: RL/tests/conftest.py
+# Desc: Makes the RL modules and the snake_gym package importable, as when running the scripts from RL
+#
+##########################
+
+import os
+import sys
+
+RL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RL_DIR, os.path.join(os.path.dirname(RL_DIR), "snake_gym")]
@@ -0,0 +1,58 @@
+#
+# File: RL/tests/test_planner.py
+# Desc: Tests of the lookahead planner
+#
+##########################
+
+import random
+import pytest
+import torch
+from snake_gym import Env
+from snake_gym.game.actions import AGENT_MOVES
+from agent.planner import Planner, SimSnake
+
+FORWARD = 1
+
+
+class ConstantQ(torch.nn.Module):
+    """
+    Q-network that values every action of every state the same, higher than the food reward
+    """
+
+    def forward(self, states):
+        return torch.full((len(states), 3), 100.0)
+
+
+def food_ahead(seed):
+    """
+    Function to create an env with the food on the cell in front of the head of the snake
+    :param seed: seed of the env
+    :return: Env
+    """
+    env = Env(human_player=False, headless=True, seed=seed)
+    env.reset()
+
+    snake = env.snake
+    dx, dy, _ = AGENT_MOVES[snake.direction][FORWARD]
+    x, y = snake.body[0]
+    env.world.food_location = [(x + dx) % env.config.width, (y + dy) % env.config.height]
+    return env
+
+
+@pytest.mark.parametrize("budget", [{"max_nodes": 1}, {"max_nodes": 50}, {"max_nodes": 500}, {"max_ms": 5}])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_eats_food_against_large_q_values(budget, seed):
+    planner = Planner(ConstantQ(), seed=seed, **budget)
+    assert planner.plan(food_ahead(seed)) == FORWARD
+
+
+def test_place_food_on_free_cell():
+    game = SimSnake.from_env(food_ahead(0))
+    eaten, reward, _ = game.step(FORWARD)
+    assert reward == 1 and eaten.food is None
+
+    rng = random.Random(0)
+    for _ in range(100):
+        sample = eaten.place_food(rng)
+        assert sample.food not in eaten.occupied
+        assert len(sample.get_state()) == 4
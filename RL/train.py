@@ -5,61 +5,124 @@
 #
 #################
 
-import pygame
+import argparse
+import copy
 import os
+import queue
+import numpy as np
 import torch
 import torch.nn.functional as F
+import torch.multiprocessing as mp
+from types import SimpleNamespace
 from torch import optim
-from utils.helpers import compute_q_val, compute_target, select_action, get_epsilon
-from utils.memory import ReplayMemory
+from utils.helpers import compute_q_val, compute_target, update_target, select_action, select_actions, get_epsilon
+from utils.memory import ReplayMemory, PrioritizedReplayMemory
+from utils.actors import run_actor
+from utils.telemetry import Telemetry
 from agent.qnetwork import QNetwork
-from pygame.locals import *
 from snake_gym.env import Env
+from snake_gym.vector_env import VectorEnv
 
+# the timed phases of playing and learning, declared up front so the log has a column for each from the first row
+PHASES = ("env reset", "action selection", "env step", "state encoding", "queue receive", "replay push",
+          "replay sampling", "tensor conversion", "forward/backward", "optimizer step", "target sync")
 
-clock = pygame.time.Clock()
 
-
-def train(model, memory, optimizer, params):
+def train(model, memory, optimizer, params, target_model=None, telemetry=None):
     """
     Method to train the model for a single step
+    :param model: the DQN model to be trained
+    :param memory: the replaymemory used for training
+    :param optimizer: the optimizer of the model
+    :param params: the hyperparameters of the experiment
+    :param target_model: the frozen target network, if any
+    :param telemetry: Telemetry that times the phases of the step, if any
+    :return: the loss, or None if there was not enough experience to learn from
     """
 
     # don't learn without some decent experience
     if len(memory) < params.batch_size:
         return None
 
-    # random transition batch is taken from experience replay memory
-    transitions = memory.sample(params.batch_size)
+    lap = telemetry.lap if telemetry is not None else _no_lap
 
-    # transition is a list of 4-tuples, instead we want 4 vectors (as torch.Tensor's)
-    state, action, reward, next_state, done = zip(*transitions)
-
-    # convert to PyTorch and define types
-    state = torch.tensor(state, dtype=torch.float)
-    action = torch.tensor(action, dtype=torch.int64)  # Need 64 bit to use them as index
-    next_state = torch.tensor(next_state, dtype=torch.float)
-    reward = torch.tensor(reward, dtype=torch.float)
-    done = torch.tensor(done, dtype=torch.bool)  # Boolean
+    # random transition batch is taken from experience replay memory and converted to torch tensors
+    # without copying (actions are int64 so they can be used as index, done is boolean)
+    batch = memory.sample(params.batch_size)
+    lap("replay sampling")
+    state, action, reward, next_state, done = (torch.from_numpy(array) for array in batch[:5])
+    lap("tensor conversion")
 
     # compute the q value
     q_val = compute_q_val(model, state, action)
 
     with torch.no_grad():
-        target = compute_target(model, reward, next_state, done, params.discount_factor)
+        target = compute_target(model, reward, next_state, done, params.discount_factor,
+                                target_model, params.double_dqn)
 
     # loss is measured from error between current and newly expected Q values
-    loss = F.smooth_l1_loss(q_val, target)
+    if isinstance(memory, PrioritizedReplayMemory):
+
+        # correct for the prioritized sampling and store the new TD errors as priorities
+        weights, indices = torch.from_numpy(batch[5]), batch[6]
+        loss = (weights.view(-1, 1) * F.smooth_l1_loss(q_val, target, reduction="none")).mean()
+        memory.update_priorities(indices, (q_val - target).detach().view(-1).numpy())
+    else:
+        loss = F.smooth_l1_loss(q_val, target)
 
     # backpropagation of loss to Neural Network (PyTorch magic)
     optimizer.zero_grad()
     loss.backward()
+    lap("forward/backward")
     optimizer.step()
+    lap("optimizer step")
 
     return loss.item()
 
 
-def run_episodes(model, env, memory, params):
+def _no_lap(phase):
+    """
+    Stand-in for Telemetry.lap when a training step isn't timed
+    :param phase: the name of the phase
+    """
+
+
+def create_target_model(model, params):
+    """
+    Method to create the frozen target network, if the hyperparameters ask for one
+    :param model: the DQN model to be trained
+    :param params: the hyperparameters of the experiment
+    :return: a copy of the model, or None
+    """
+    if params.target_update is None:
+        return None
+
+    target_model = copy.deepcopy(model)
+    target_model.requires_grad_(False)
+    return target_model
+
+
+def sync_target(target_model, model, updates, params):
+    """
+    Method to update the target network after a training step
+    "hard" copies the weights every params.target_update_every updates,
+    "soft" moves them towards the online network by params.tau after every update
+    :param target_model: the target network, or None
+    :param model: the DQN model to be trained
+    :param updates: the number of training steps so far
+    :param params: the hyperparameters of the experiment
+    :return: None
+    """
+    if target_model is None:
+        return
+
+    if params.target_update == "soft":
+        update_target(target_model, model, params.tau)
+    elif updates % params.target_update_every == 0:
+        update_target(target_model, model)
+
+
+def run_episodes(model, env, memory, params, telemetry=None):
     """
     Method to run an experiment for a set number of episodes. It performs
     the training end-to-end
@@ -67,37 +130,71 @@ def run_episodes(model, env, memory, params):
     :param env: the snake gym environment
     :param memory: the replaymemory used for training
     :param params: the hyperparameters of the experiment
+    :param telemetry: Telemetry that times and logs the run, by default one that only keeps the statistics
     :return: list consisting of the duration of each of the episodes
     """
 
     optimizer = optim.Adam(model.parameters(), params.learn_rate)
+    target_model = create_target_model(model, params)
+    updates = 0
+
+    # time the encoding of the states apart from the rest of the env step
+    telemetry = telemetry if telemetry is not None else Telemetry(phases=PHASES)
+    env.time_observations(telemetry.timer("state encoding"))
+    telemetry.skip()
+
+    # pygame is only needed to limit the frame rate when someone is watching
+    clock = None
+    if params.watch:
+        import pygame
+        clock = pygame.time.Clock()
 
     global_steps = 0  # Count the steps (do not reset at episode start, to compute epsilon)
     episode_durations = []  #
     for i in range(params.num_episodes):
 
         t = 0
-        state = env.reset()
+        score = 0
+        state, _ = env.reset()
+        telemetry.lap("env reset")
+
+        # every 25th episode is played greedily, and drawn when someone is watching
+        evaluate = i % 25 == 0 and i != 0
+        watch = evaluate and params.watch
 
         # Take actions until end of episode
-        for t in range(1000):
+        for t in range(params.max_steps):
 
-            # determine game speed
-            if i % 25 == 0 and i != 0:
-                df = clock.tick(25)
+            # determine exploration
+            if evaluate:
                 epsilon = 0
             else:
-                df = clock.tick(100)
                 epsilon = get_epsilon(global_steps)
 
             # perform a step in the environment
             action = select_action(model, state, epsilon)
-            next_state, reward, done = env.step(action)
+            telemetry.lap("action selection")
+            next_state, reward, done, _, _ = env.step(action)
+            telemetry.lap("env step")
+            telemetry.steps()
+            score += reward == 1
+
+            # the frame rate is only limited when someone is watching, which isn't timed
+            if watch:
+                env.render()
+                df = clock.tick(25)
+                telemetry.skip()
+
             memory.push((state, action, reward, next_state, done))
+            telemetry.lap("replay push")
 
             # only sample if there is enough memory
-            if len(memory) > PARAMS.batch_size:
-                loss = train(model, memory, optimizer, params)
+            if len(memory) > params.batch_size:
+                loss = train(model, memory, optimizer, params, target_model, telemetry)
+                updates += 1
+                sync_target(target_model, model, updates, params)
+                telemetry.update(loss)
+                telemetry.lap("target sync")
 
             state = next_state
             global_steps += 1
@@ -107,10 +204,163 @@ def run_episodes(model, env, memory, params):
                 break
 
         episode_durations.append(t)
+        telemetry.episode(int(score), t + 1)
 
+    env.time_observations(None)
     return episode_durations
 
 
+def run_vector_episodes(model, env, memory, params, telemetry=None):
+    """
+    Method to run an experiment on a batch of games at once. Every step selects the actions of
+    all games with a single forward pass and stores all their transitions at once
+    :param model: the DQN model to be trained
+    :param env: the snake gym VectorEnv
+    :param memory: the replaymemory used for training
+    :param params: the hyperparameters of the experiment
+    :param telemetry: Telemetry that times and logs the run, by default one that only keeps the statistics
+    :return: list consisting of the duration of each of the episodes
+    """
+
+    optimizer = optim.Adam(model.parameters(), params.learn_rate)
+    target_model = create_target_model(model, params)
+    updates = 0
+
+    # time the encoding of the states apart from the rest of the env step
+    telemetry = telemetry if telemetry is not None else Telemetry(phases=PHASES)
+    env.time_observations(telemetry.timer("state encoding"))
+    telemetry.skip()
+
+    global_steps = 0  # Count the steps of a single game, so epsilon decays as it would with one env
+    episode_durations = []
+    t = np.zeros(env.num_envs, dtype=np.int64)
+    scores = np.zeros(env.num_envs, dtype=np.int64)
+
+    states = env.reset()
+    telemetry.lap("env reset")
+    while len(episode_durations) < params.num_episodes:
+
+        # perform a step in all environments
+        actions = select_actions(model, states, get_epsilon(global_steps))
+        telemetry.lap("action selection")
+        next_states, rewards, dones = env.step(actions)
+        telemetry.lap("env step")
+        telemetry.steps(env.num_envs)
+        memory.push_batch(states, actions, rewards, next_states, dones)
+        telemetry.lap("replay push")
+
+        # only sample if there is enough memory
+        if len(memory) > params.batch_size:
+            for _ in range(params.updates_per_step):
+                loss = train(model, memory, optimizer, params, target_model, telemetry)
+                updates += 1
+                sync_target(target_model, model, updates, params)
+                telemetry.update(loss)
+                telemetry.lap("target sync")
+
+        global_steps += 1
+        t += 1
+        scores += rewards == 1
+
+        # finished games were reset by the env, games that take too long are cut off here
+        cut_off = (t == params.max_steps) & ~dones
+        if cut_off.any():
+            next_states[cut_off] = env.reset_games(np.flatnonzero(cut_off))
+            telemetry.lap("env reset")
+
+        finished = dones | cut_off
+        episode_durations.extend((t[finished] - 1).tolist())
+        for game in np.flatnonzero(finished):
+            telemetry.episode(int(scores[game]), int(t[game]))
+        t[finished] = 0
+        scores[finished] = 0
+
+        states = next_states
+
+    env.time_observations(None)
+    return episode_durations[:params.num_episodes]
+
+
+def run_actor_learner(model, memory, params, telemetry=None):
+    """
+    Method to run an experiment with parallel actors. params.num_actors processes play the game
+    with a periodically synced copy of the model and stream their transitions to this process,
+    which only learns. Training throughput scales with the number of cores
+    :param model: the DQN model to be trained
+    :param memory: the replaymemory used for training
+    :param params: the hyperparameters of the experiment
+    :param telemetry: Telemetry that times the learner and logs the run, by default one that only keeps the statistics.
+                      Playing happens in the actors, so only the phases of the learner are timed
+    :return: list consisting of the duration of each of the episodes
+    """
+
+    optimizer = optim.Adam(model.parameters(), params.learn_rate)
+    target_model = create_target_model(model, params)
+    updates = 0
+    telemetry = telemetry if telemetry is not None else Telemetry(phases=PHASES)
+
+    # the actors read the weights straight from the shared memory of the learner's model
+    model.share_memory()
+
+    # pass the hyperparameters by value, the actors don't see changes made to the class
+    actor_params = SimpleNamespace(**{k: v for k, v in vars(params).items() if not k.startswith("_")})
+
+    ctx = mp.get_context("spawn")
+    transitions = ctx.Queue(maxsize=4 * params.num_actors)
+    stop = ctx.Event()
+    actors = [ctx.Process(target=run_actor, args=(seed, model, transitions, stop, actor_params), daemon=True)
+              for seed in range(params.num_actors)]
+    for actor in actors:
+        actor.start()
+    telemetry.skip()
+
+    episode_durations = []
+    while len(episode_durations) < params.num_episodes:
+
+        # store everything the actors sent, waiting for them when there is not enough to learn from yet
+        for (state, action, reward, next_state, done), episodes in \
+                _receive(transitions, block=len(memory) < params.batch_size):
+            telemetry.lap("queue receive")
+            memory.push_batch(state, action, reward, next_state, done)
+            telemetry.steps(len(action))
+            telemetry.lap("replay push")
+
+            for duration, score in episodes:
+                episode_durations.append(duration)
+                telemetry.episode(int(score), duration + 1)
+            telemetry.skip()
+
+        loss = train(model, memory, optimizer, params, target_model, telemetry)
+        if loss is not None:
+            updates += 1
+            sync_target(target_model, model, updates, params)
+            telemetry.update(loss)
+            telemetry.lap("target sync")
+
+    # stop the actors, emptying the queue so none of them stays blocked on it
+    stop.set()
+    while any(actor.is_alive() for actor in actors):
+        list(_receive(transitions, block=False))
+        for actor in actors:
+            actor.join(timeout=0.1)
+
+    return episode_durations[:params.num_episodes]
+
+
+def _receive(transitions, block):
+    """
+    Generator of all messages that are currently in the queue
+    :param transitions: the queue the actors send to
+    :param block: whether to wait for the first message
+    """
+    try:
+        yield transitions.get(timeout=1) if block else transitions.get_nowait()
+        while True:
+            yield transitions.get_nowait()
+    except queue.Empty:
+        return
+
+
 class PARAMS:
     """
     Class holding the hyperparameters used for this training
@@ -120,6 +370,24 @@ class PARAMS:
     discount_factor = 0.8
     learn_rate = 1e-3
     num_hidden = 128
+    memory_capacity = 1000
+    prioritized = False
+    per_alpha = 0.6
+    per_beta = 0.4
+    max_steps = 1000
+    watch = False
+    num_actors = 0
+    sync_every = 100
+    actor_batch_size = 64
+    num_envs = 1
+    updates_per_step = 1
+    target_update = None  # None, "hard" or "soft"
+    target_update_every = 100
+    tau = 0.005
+    double_dqn = False
+    log_path = None  # .csv or .jsonl file the telemetry logs a row per episode to
+    live_summary = False
+    record_path = None  # file to record the episodes of a single env to
 
 
 def main():
@@ -128,22 +396,57 @@ def main():
     functions and functions declared above
     :return:
     """
-
-    # create game
-    pygame.init()
-
-    # create board and randomly place food
-    env = Env(human_player=False)
+    parser = argparse.ArgumentParser(description="Train a DQN agent to play Snake")
+    parser.add_argument("--episodes", type=int, default=PARAMS.num_episodes)
+    parser.add_argument("--actors", type=int, default=PARAMS.num_actors,
+                        help="number of actor processes, 0 plays and learns in this process, "
+                             "with actors only the phases of the learner are timed")
+    parser.add_argument("--envs", type=int, default=PARAMS.num_envs,
+                        help="number of games played at once in a VectorEnv")
+    parser.add_argument("--watch", action="store_true", help="draw every 25th episode at a watchable speed")
+    parser.add_argument("--log", default=PARAMS.log_path,
+                        help="log throughput, loss, score and time per phase of every episode to this .csv or .jsonl")
+    parser.add_argument("--live", action="store_true", help="keep a summary of the run up to date in the terminal")
+    parser.add_argument("--record", default=PARAMS.record_path,
+                        help="record every episode to this file, to play them back with snake_gym.recording, "
+                             "not with --actors or --envs")
+    args = parser.parse_args()
+
+    # only the game played in this process without a VectorEnv is an Env that can record
+    if args.record is not None and (args.actors or args.envs > 1):
+        parser.error("--record can only be used without --actors and --envs")
+
+    PARAMS.num_episodes = args.episodes
+    PARAMS.num_actors = args.actors
+    PARAMS.num_envs = args.envs
+    PARAMS.watch = args.watch
+    PARAMS.log_path = args.log
+    PARAMS.live_summary = args.live
+    PARAMS.record_path = args.record
+
+    # create board and randomly place food, only drawing the episodes we watch
+    env = Env(human_player=False, headless=True, record=PARAMS.record_path)
     in_channels = env.get_state_size()
 
     # initialize the replay memory
-    memory = ReplayMemory(1000)
+    if PARAMS.prioritized:
+        memory = PrioritizedReplayMemory(PARAMS.memory_capacity, in_channels, PARAMS.per_alpha, PARAMS.per_beta)
+    else:
+        memory = ReplayMemory(PARAMS.memory_capacity, in_channels)
 
     # create model
     model = QNetwork(in_channels, PARAMS.num_hidden)
 
-    # train
-    episode_durations = run_episodes(model, env, memory, PARAMS)
+    # train, with actors only the phases of the learner are timed
+    telemetry = Telemetry(PARAMS.log_path, PARAMS.live_summary, phases=PHASES)
+    if PARAMS.num_actors:
+        episode_durations = run_actor_learner(model, memory, PARAMS, telemetry)
+    elif PARAMS.num_envs > 1:
+        episode_durations = run_vector_episodes(model, VectorEnv(PARAMS.num_envs), memory, PARAMS, telemetry)
+    else:
+        episode_durations = run_episodes(model, env, memory, PARAMS, telemetry)
+    telemetry.close()
+    env.close()
 
     # save the trained agent
     model.save(os.path.dirname(os.path.realpath(__file__)) + "/agent/trained_agent.pt")
@@ -0,0 +1,84 @@
+#
+# File: RL/utils/actors.py
+# Desc: Actor processes that play the game and stream their transitions to the learner
+#
+#################
+
+import queue
+import random
+import numpy as np
+import torch
+from snake_gym import make_agent_env
+from agent.qnetwork import QNetwork
+from utils.helpers import select_action, get_epsilon
+
+
+def run_actor(seed, shared_model, transitions, stop, params):
+    """
+    Function run by every actor process. It plays episodes with a copy of the shared model,
+    which is synced with the learner every params.sync_every steps, and sends its transitions
+    to the learner in batches
+    :param seed: seed for the environment and the exploration of this actor
+    :param shared_model: the model of the learner, in shared memory
+    :param transitions: the queue to send (transitions, (duration, score) of the finished episodes) to
+    :param stop: event that is set when the learner is done
+    :param params: the hyperparameters of the experiment
+    """
+
+    # the learner uses the other cores, a single thread is fastest for single states anyway
+    torch.set_num_threads(1)
+    rng = random.Random(seed)
+
+    env = make_agent_env(seed=seed)
+    model = QNetwork(env.get_state_size(), params.num_hidden)
+
+    batch, episodes = [], []
+    steps, t, score = 0, 0, 0
+    state, _ = env.reset()
+    while not stop.is_set():
+
+        # get the latest weights of the learner
+        if steps % params.sync_every == 0:
+            model.load_state_dict(shared_model.state_dict())
+
+        # perform a step in the environment
+        with torch.no_grad():
+            action = select_action(model, state, get_epsilon(steps), rng)
+        next_state, reward, done, _, _ = env.step(action)
+        batch.append((state, action, reward, next_state, done))
+        score += reward == 1
+
+        state = next_state
+        steps += 1
+        t += 1
+
+        # episodes are cut off after the same number of steps as in run_episodes
+        if done or t == params.max_steps:
+            episodes.append((t - 1, score))
+            state, _ = env.reset()
+            t, score = 0, 0
+
+        if len(batch) == params.actor_batch_size:
+            _send(transitions, batch, episodes, stop)
+            batch, episodes = [], []
+
+
+def _send(transitions, batch, episodes, stop):
+    """
+    Private function to send a batch of transitions to the learner as arrays
+    :param transitions: the queue to the learner
+    :param batch: list of (state, action, reward, next_state, done) tuples
+    :param episodes: the (duration, score) of the episodes that finished in this batch
+    :param stop: event that is set when the learner is done
+    """
+    state, action, reward, next_state, done = zip(*batch)
+    arrays = (np.array(state, dtype=np.float32), np.array(action), np.array(reward, dtype=np.float32),
+              np.array(next_state, dtype=np.float32), np.array(done))
+
+    # don't block forever on a full queue when the learner has stopped
+    while not stop.is_set():
+        try:
+            transitions.put((arrays, episodes), timeout=0.1)
+            return
+        except queue.Full:
+            continue
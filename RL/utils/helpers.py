@@ -2,6 +2,9 @@ import torch
 import random
 import numpy as np
 
+# random number generator used for batched exploration
+_rng = np.random.default_rng()
+
 
 def get_epsilon(it):
 
@@ -15,21 +18,53 @@ def get_epsilon(it):
     return epsilon
 
 
-def select_action(model, state, epsilon):
+def select_action(model, state, epsilon, rng=random):
+    """
+    Method to select an epsilon-greedy action for a single state
+    :param model: the Q-network
+    :param state: the state
+    :param epsilon: the exploration rate
+    :param rng: random number generator used for exploration, a seeded random.Random makes runs reproducible
+    :return: action
+    """
 
     # feed state to model to extract action
     actions = model(torch.FloatTensor(state))
     values, indices = actions.max(0)
 
     # determine if the model explores or not
-    if random.random() < epsilon:
-        a = np.random.choice(range(len(actions))).item()
+    if rng.random() < epsilon:
+        a = rng.randrange(len(actions))
     else:
         a = indices.item()
 
     return a
 
 
+def select_actions(model, states, epsilons, rng=None):
+    """
+    Method to select epsilon-greedy actions for a batch of states with a single forward pass
+    :param model: the Q-network
+    :param states: the states [batch_size x state_size]
+    :param epsilons: the exploration rate of each state, a scalar or [batch_size]
+    :param rng: numpy random generator used for exploration
+    :return: actions [batch_size]
+    """
+    rng = rng or _rng
+
+    # feed the states to the model to extract the greedy actions
+    with torch.inference_mode():
+        actions = model(torch.as_tensor(states, dtype=torch.float32))
+    num_actions = actions.shape[1]
+    actions = actions.argmax(1).numpy()
+
+    # determine which states explore and give those a random action
+    explore = rng.random(len(actions)) < epsilons
+    actions[explore] = rng.integers(0, num_actions, size=int(explore.sum()))
+
+    return actions
+
+
 def compute_q_val(model, state, action):
 
     # get the actions given a batch of states
@@ -41,14 +76,27 @@ def compute_q_val(model, state, action):
     return q_val
 
 
-def compute_target(model, reward, next_state, done, discount_factor):
+def compute_target(model, reward, next_state, done, discount_factor, target_model=None, double=False):
     """
     Method that uses the next state to compute the target
+    :param model: the online network that is being trained
+    :param reward: the rewards [batch_size]
+    :param next_state: the next states [batch_size x state_size]
+    :param done: whether the next states are terminal [batch_size]
+    :param discount_factor: the discount of future rewards
+    :param target_model: frozen copy of the network used to evaluate the next states, defaults to model
+    :param double: if True, the online network selects the next action and the target network evaluates it
+    :return: target [batch_size x 1]
     """
+    if target_model is None:
+        target_model = model
 
     # get action
-    actions = model(next_state)
-    _, indices = actions.max(1)
+    actions = target_model(next_state)
+    if double:
+        _, indices = model(next_state).max(1)
+    else:
+        _, indices = actions.max(1)
 
     # convert to target
     indices = torch.gather(actions, 1, indices.view(-1, 1))
@@ -57,3 +105,19 @@ def compute_target(model, reward, next_state, done, discount_factor):
     # set target to just the reward if next_state is terminal
     target[done] = reward[done].view(target[done].shape)
     return target
+
+
+def update_target(target_model, model, tau=1.0):
+    """
+    Method to move the weights of the target network towards the online network
+    :param target_model: the target network
+    :param model: the online network
+    :param tau: the fraction to move, 1 copies the weights (hard update), smaller values give a Polyak average
+    :return: None
+    """
+    with torch.no_grad():
+        for target_param, param in zip(target_model.parameters(), model.parameters()):
+            if tau == 1.0:
+                target_param.copy_(param)
+            else:
+                target_param.mul_(1 - tau).add_(param, alpha=tau)
@@ -1,4 +1,5 @@
-import random
+import numpy as np
+import torch
 
 
 class ReplayMemory:
@@ -6,20 +7,285 @@ class ReplayMemory:
     Experience replay
     This class stores trials and shuffles them around such that the model
     will not easily get stuck in a local optimum
+
+    The transitions are stored in preallocated arrays that are used as a ring buffer,
+    so pushing is O(1) and the oldest transition is overwritten once the memory is full
     """
 
-    def __init__(self, capacity):
-        self.capacity = capacity
-        self.memory = []
+    def __init__(self, capacity, state_shape, seed=None):
+        """
+        Constructor
+        :param capacity: the maximum number of transitions to store
+        :param state_shape: the shape of a single state, or its size
+        :param seed: seed for the sampling
+        """
+        self.capacity = int(capacity)
+        state_shape = tuple(np.atleast_1d(state_shape))
+
+        self.state = np.zeros((self.capacity, *state_shape), dtype=np.float32)
+        self.action = np.zeros(self.capacity, dtype=np.int64)
+        self.reward = np.zeros(self.capacity, dtype=np.float32)
+        self.next_state = np.zeros((self.capacity, *state_shape), dtype=np.float32)
+        self.done = np.zeros(self.capacity, dtype=np.bool_)
+
+        # the slot that is written next and the number of stored transitions
+        self.position = 0
+        self.size = 0
+
+        self.rng = np.random.default_rng(seed)
 
     def push(self, transition):
-        if len(self.memory) == self.capacity:
-            del self.memory[0]
+        """
+        Method to store a single transition
+        :param transition: (state, action, reward, next_state, done)
+        """
+        state, action, reward, next_state, done = transition
+
+        i = self.position
+        self.state[i] = state
+        self.action[i] = action
+        self.reward[i] = reward
+        self.next_state[i] = next_state
+        self.done[i] = done
 
-        self.memory.append(transition)
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, state, action, reward, next_state, done):
+        """
+        Method to store a batch of transitions at once
+        :param state: the states [batch_size x state_shape]
+        :param action: the actions [batch_size]
+        :param reward: the rewards [batch_size]
+        :param next_state: the next states [batch_size x state_shape]
+        :param done: whether the transitions ended the game [batch_size]
+        """
+        i = self._next_slots(len(action))
+        self.state[i] = state
+        self.action[i] = action
+        self.reward[i] = reward
+        self.next_state[i] = next_state
+        self.done[i] = done
+
+        self.position = (self.position + len(action)) % self.capacity
+        self.size = min(self.size + len(action), self.capacity)
+
+    def _next_slots(self, n):
+        """
+        Private method to get the slots the next n transitions are written to
+        :param n: the number of transitions
+        :return: indices [n]
+        """
+        return (self.position + np.arange(n)) % self.capacity
+
+    def sample_indices(self, batch_size):
+        """
+        Method to draw the slots of a random batch, with replacement
+        :param batch_size: the number of transitions to draw
+        :return: indices [batch_size]
+        """
+        return self.rng.integers(0, self.size, size=batch_size)
 
     def sample(self, batch_size):
-        return random.sample(self.memory, batch_size)
+        """
+        Method to sample a random batch of transitions
+        :param batch_size: the number of transitions to sample
+        :return: (state, action, reward, next_state, done) as arrays
+        """
+        i = self.sample_indices(batch_size)
+        return self.state[i], self.action[i], self.reward[i], self.next_state[i], self.done[i]
+
+    def sample_tensors(self, batch_size):
+        """
+        Method to sample a random batch of transitions as torch tensors
+        :param batch_size: the number of transitions to sample
+        :return: (state, action, reward, next_state, done) as tensors
+        """
+        return tuple(torch.from_numpy(array) for array in self.sample(batch_size))
 
     def __len__(self):
-        return len(self.memory)
+        return self.size
+
+
+class SumTree:
+    """
+    Binary tree in which every node holds the sum of its children.
+    The leaves hold the priorities, so sampling proportional to priority and
+    updating a priority are both O(log N)
+    """
+
+    def __init__(self, capacity):
+        """
+        Constructor
+        :param capacity: the number of leaves
+        """
+
+        # round the number of leaves up to a power of 2, so all leaves are at the same depth
+        self.leaves = 1
+        while self.leaves < capacity:
+            self.leaves *= 2
+
+        # node 1 is the root, the children of node i are 2i and 2i + 1
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    @property
+    def total(self):
+        """
+        The sum of all priorities
+        """
+        return self.tree[1]
+
+    def get(self, indices):
+        """
+        Method to get the priorities of leaves
+        :param indices: the leaf indices
+        :return: priorities
+        """
+        return self.tree[indices + self.leaves]
+
+    def set(self, index, priority):
+        """
+        Method to set the priority of a single leaf
+        :param index: the leaf index
+        :param priority: the new priority
+        """
+        node = index + self.leaves
+        self.tree[node] = priority
+
+        node //= 2
+        while node >= 1:
+            self.tree[node] = self.tree[2 * node] + self.tree[2 * node + 1]
+            node //= 2
+
+    def update(self, indices, priorities):
+        """
+        Method to set the priorities of a batch of leaves, updating every level of the tree at once
+        :param indices: the leaf indices
+        :param priorities: the new priorities
+        """
+        nodes = np.asarray(indices) + self.leaves
+        self.tree[nodes] = priorities
+
+        # all leaves are at the same depth, so every level is updated in one go.
+        # nodes that share a parent write the same sum, so duplicates do no harm
+        while nodes[0] > 1:
+            nodes = nodes // 2
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """
+        Method to find the leaves at which the cumulative priority reaches the given values
+        :param values: the values, between 0 and the total priority
+        :return: leaf indices
+        """
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+
+        # walk down the tree, going right whenever the value is beyond the left subtree
+        while nodes[0] < self.leaves:
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values = np.where(go_right, values - self.tree[left], values)
+            nodes = np.where(go_right, left + 1, left)
+
+        return nodes - self.leaves
+
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """
+    Prioritized experience replay
+    Transitions are sampled proportional to their priority (the size of their last TD error),
+    so rare transitions like catching food or colliding are replayed more often.
+    The bias this introduces is corrected with importance-sampling weights
+    """
+
+    def __init__(self, capacity, state_shape, alpha=0.6, beta=0.4, beta_increment=1e-4, epsilon=1e-5, seed=None):
+        """
+        Constructor
+        :param capacity: the maximum number of transitions to store
+        :param state_shape: the shape of a single state, or its size
+        :param alpha: how much the priorities are used, 0 is uniform sampling
+        :param beta: how much the importance-sampling weights correct for the priorities, annealed to 1
+        :param beta_increment: the increase of beta after every sample
+        :param epsilon: small value added to the priorities so every transition can be sampled
+        :param seed: seed for the sampling
+        """
+        super().__init__(capacity, state_shape, seed)
+
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+
+        # new transitions get the highest priority seen so far, so they are replayed at least once
+        self.max_priority = 1.0
+        self.tree = SumTree(self.capacity)
+
+    def push(self, transition):
+        """
+        Method to store a single transition with the maximum priority
+        :param transition: (state, action, reward, next_state, done)
+        """
+        self.tree.set(self.position, self.max_priority ** self.alpha)
+        super().push(transition)
+
+    def push_batch(self, state, action, reward, next_state, done):
+        """
+        Method to store a batch of transitions at once with the maximum priority
+        :param state: the states [batch_size x state_shape]
+        :param action: the actions [batch_size]
+        :param reward: the rewards [batch_size]
+        :param next_state: the next states [batch_size x state_shape]
+        :param done: whether the transitions ended the game [batch_size]
+        """
+        self.tree.update(self._next_slots(len(action)), self.max_priority ** self.alpha)
+        super().push_batch(state, action, reward, next_state, done)
+
+    def sample_indices(self, batch_size):
+        """
+        Method to draw the slots of a batch proportional to their priority
+        The priority range is split into equal segments and one slot is drawn from each
+        :param batch_size: the number of transitions to draw
+        :return: indices [batch_size]
+        """
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+
+        # rounding might end up in the empty leaves beyond the stored transitions
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def sample(self, batch_size):
+        """
+        Method to sample a batch of transitions proportional to their priority
+        :param batch_size: the number of transitions to sample
+        :return: (state, action, reward, next_state, done, weights, indices) as arrays
+        """
+        i = self.sample_indices(batch_size)
+
+        # importance-sampling weights, normalized so they only scale the loss down
+        probabilities = self.tree.get(i) / self.tree.total
+        weights = (self.size * probabilities) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        return self.state[i], self.action[i], self.reward[i], self.next_state[i], self.done[i], weights, i
+
+    def sample_tensors(self, batch_size):
+        """
+        Method to sample a batch of transitions proportional to their priority as torch tensors
+        :param batch_size: the number of transitions to sample
+        :return: (state, action, reward, next_state, done, weights) as tensors and the indices as array
+        """
+        *arrays, indices = self.sample(batch_size)
+        return (*(torch.from_numpy(array) for array in arrays), indices)
+
+    def update_priorities(self, indices, td_errors):
+        """
+        Method to set the priorities of sampled transitions to their new TD errors
+        :param indices: the indices returned by sample
+        :param td_errors: the absolute TD errors of the transitions
+        """
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
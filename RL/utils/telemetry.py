@@ -0,0 +1,227 @@
+#
+# File: RL/utils/telemetry.py
+# Desc: Low-overhead timers and rolling statistics of a training run, logged to CSV or JSONL
+#
+#################
+
+import csv
+import json
+import sys
+import time
+from collections import defaultdict, deque
+import numpy as np
+
+
+class Telemetry:
+    """
+    Instrumentation of a training loop. The loop calls lap(phase) at the end of every phase, which
+    adds the time since the previous lap to that phase, so timing costs a single clock read per phase.
+    Every finished episode writes a row with the rolling throughput, loss, score and the time spent
+    per phase since the previous row to the log, and refreshes the live summary
+    """
+
+    def __init__(self, log_path=None, live=False, window=100, live_interval=1.0, phases=()):
+        """
+        Constructor
+        :param log_path: file to log a row per episode to, .jsonl for JSON lines and CSV otherwise
+        :param live: whether to keep a summary line up to date in the terminal
+        :param window: the number of episodes and updates the rolling loss and score are averaged over
+        :param live_interval: the minimum number of seconds between refreshes of the live summary
+        :param phases: the names of the phases that are logged from the first row on, even before they are timed
+        """
+        self.live = live
+        self.live_interval = live_interval
+
+        # the total time per phase and the totals at the previous row
+        self.phases = defaultdict(float, dict.fromkeys(phases, 0.0))
+        self._logged_phases = {}
+        self._last_lap = time.perf_counter()
+        self._nested = 0.0
+
+        # counters and rolling statistics
+        self.start = time.perf_counter()
+        self.num_steps = 0
+        self.num_updates = 0
+        self.num_episodes = 0
+        self.losses = deque(maxlen=window)
+        self.scores = deque(maxlen=window)
+        self._rate_window = deque(maxlen=window)
+        self._last_live = 0.0
+
+        # the log file, the CSV writer is created with the first row so it knows the phases
+        self._file = None
+        self._writer = None
+        self._jsonl = log_path is not None and log_path.endswith(".jsonl")
+        if log_path is not None:
+            self._file = open(log_path, "w+", newline="")
+
+    def lap(self, phase):
+        """
+        Method to end a phase, the time since the previous lap is added to it
+        Time reported to timers since the previous lap is left out, it was already counted
+        :param phase: the name of the phase
+        """
+        now = time.perf_counter()
+        self.phases[phase] += now - self._last_lap - self._nested
+        self._last_lap = now
+        self._nested = 0.0
+
+    def skip(self):
+        """
+        Method to leave the time since the previous lap out of all phases, e.g. time spent drawing
+        """
+        self._last_lap = time.perf_counter()
+        self._nested = 0.0
+
+    def timer(self, phase):
+        """
+        Method to create a function that reports time spent in a phase that runs inside another one,
+        such as the state encoding inside the env step, e.g. for Env.time_observations
+        :param phase: the name of the phase
+        :return: function taking the seconds, which are moved from the enclosing phase to this one
+        """
+        def report(seconds):
+            self.phases[phase] += seconds
+            self._nested += seconds
+
+        return report
+
+    def steps(self, n=1):
+        """
+        Method to count environment steps
+        :param n: the number of steps, e.g. the number of games of a VectorEnv
+        """
+        self.num_steps += n
+
+    def update(self, loss):
+        """
+        Method to count a training step
+        :param loss: the loss returned by train, None if there was nothing to learn from yet
+        """
+        if loss is None:
+            return
+
+        self.num_updates += 1
+        self.losses.append(loss)
+
+    def episode(self, score, length):
+        """
+        Method to record a finished episode, which logs a row and refreshes the live summary
+        :param score: the number of food eaten
+        :param length: the number of steps of the episode
+        """
+        self.num_episodes += 1
+        self.scores.append(score)
+
+        row = self.summary()
+        row["length"] = length
+        self._write(row)
+
+        if self.live and time.perf_counter() - self._last_live >= self.live_interval:
+            self._last_live = time.perf_counter()
+            self._print(row)
+
+    def summary(self):
+        """
+        Method to compute the current statistics
+        :return: dict with the counters, rolling rates, loss and score, and the seconds per phase since the last row,
+                 statistics that aren't known yet, such as the loss before the first update, are None
+        """
+        now = time.perf_counter()
+
+        # steps and updates per second over the last rows
+        self._rate_window.append((now, self.num_steps, self.num_updates))
+        then, steps, updates = self._rate_window[0]
+        elapsed = now - then
+
+        row = {
+            "episode": self.num_episodes,
+            "seconds": now - self.start,
+            "steps": self.num_steps,
+            "updates": self.num_updates,
+            "steps_per_second": (self.num_steps - steps) / elapsed if elapsed > 0 else None,
+            "updates_per_second": (self.num_updates - updates) / elapsed if elapsed > 0 else None,
+            "loss": float(np.mean(self.losses)) if self.losses else None,
+            "score": float(np.mean(self.scores)) if self.scores else None,
+        }
+
+        for phase, seconds in self.phases.items():
+            row[phase] = seconds - self._logged_phases.get(phase, 0.0)
+
+        return row
+
+    def close(self):
+        """
+        Method to print the final summary and close the log
+        """
+        if self.live:
+            sys.stdout.write("\n")
+
+        total = sum(self.phases.values())
+        for phase, seconds in sorted(self.phases.items(), key=lambda item: -item[1]):
+            if not seconds:
+                continue
+            print(f"{phase:>18}: {seconds:8.2f} s ({seconds / total * 100 if total else 0:5.1f}%)")
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, row):
+        """
+        Private method to write a row to the log
+        :param row: the statistics
+        """
+        self._logged_phases = dict(self.phases)
+        if self._file is None:
+            return
+
+        if self._jsonl:
+            self._file.write(json.dumps(row, allow_nan=False) + "\n")
+            return
+
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row))
+            self._writer.writeheader()
+
+        # a phase that wasn't declared shows up, so the log is rewritten with a column for it
+        elif row.keys() - set(self._writer.fieldnames):
+            self._file.seek(0)
+            rows = list(csv.DictReader(self._file))
+            self._file.seek(0)
+            self._file.truncate()
+            self._writer = csv.DictWriter(self._file, fieldnames=self._writer.fieldnames + [
+                key for key in row if key not in self._writer.fieldnames])
+            self._writer.writeheader()
+            self._writer.writerows(rows)
+
+        self._writer.writerow(row)
+
+    def _print(self, row):
+        """
+        Private method to overwrite the live summary line
+        :param row: the statistics
+        """
+        phases = {phase: row[phase] for phase in self.phases}
+        total = sum(phases.values())
+        slowest = max(phases, key=phases.get) if total else "-"
+
+        sys.stdout.write(f"\repisode {row['episode']:>6} | {_format(row['steps_per_second'], '8.0f')} steps/s "
+                         f"| {_format(row['updates_per_second'], '7.0f')} updates/s "
+                         f"| loss {_format(row['loss'], '7.4f')} "
+                         f"| score {_format(row['score'], '5.2f')} | most time in {slowest} "
+                         f"({phases.get(slowest, 0) / total * 100 if total else 0:.0f}%)   ")
+        sys.stdout.flush()
+
+
+def _format(value, spec):
+    """
+    Private function to format a statistic of the live summary, which is None until it is known
+    :param value: the statistic
+    :param spec: the format specification
+    :return: str
+    """
+    if value is None:
+        return format("-", ">" + spec.split(".")[0])
+
+    return format(value, spec)
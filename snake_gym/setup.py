@@ -12,6 +12,7 @@ setup(
     author_email='oscarligthart@gmail.com',
     include_package_data=True,
     install_requires=REQUIREMENTS,
+    extras_require={"kernel": ["numba"], "gym": ["gymnasium"], "gif": ["Pillow"]},
     packages=find_packages(include=['snake_gym', 'snake_gym.*']),
     entry_points={"console_scripts": ["snake-gym-demo = snake_gym.__main__:main"]}
 )
@@ -1 +1,24 @@
-from .env import Env
+from .config import EnvConfig
+from .env import Env, gymnasium
+from .vector_env import VectorEnv
+from .subproc import SubprocVectorEnv
+
+# the id of the game for gymnasium.make, vector envs and other Gymnasium tooling
+ENV_ID = "snake_gym/Snake-v0"
+
+# register the headless game, gymnasium.make(ENV_ID, render_mode="human") draws it,
+# episodes are cut off after as many steps as during training
+if gymnasium is not None and ENV_ID not in gymnasium.registry:
+    gymnasium.register(id=ENV_ID, entry_point="snake_gym.env:Env", kwargs={"headless": True},
+                       max_episode_steps=1000)
+
+
+def __getattr__(name):
+    """
+    The compiled kernel imports Numba, which takes a while, so it is only imported once it is used
+    """
+    if name in ("KernelEnv", "make_agent_env"):
+        from . import kernel_env
+        return getattr(kernel_env, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -48,7 +48,7 @@ def main():
                     action = Actions.DOWN
 
         # need to take a step here, keep track of
-        state, reward, done = env.step(action)
+        state, reward, done, _, _ = env.step(action)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+#
+# File: benchmarks/board.py
+# Desc: Benchmark of the incremental board update against rebuilding the board every tick
+#
+#####################################################
+
+import argparse
+import time
+import numpy as np
+from snake_gym.benchmarks.helpers import make_world, serpentine
+
+BOARD_SIZES = [(20, 15), (50, 50), (100, 100), (200, 200)]
+LENGTHS = [2, 50, 250, 1000]
+
+
+def rebuild(world):
+    """
+    The board update as it was done before: allocate a new board and write every body part
+    The board of the world is left as it is
+    :param world: the world to build the board of
+    :return: the new board
+    """
+    board = np.zeros(world.board.shape, dtype=world.board.dtype)
+
+    for part in world.snake.body:
+        board[part[0]][part[1]] = 1
+
+    board[world.food_location[0]][world.food_location[1]] = 2
+    return board
+
+
+def time_updates(world, actions):
+    """
+    Function to measure both board updates after every move of the snake, the rest of the tick is not timed
+    :param world: the world, with a snake that can take the actions without colliding
+    :param actions: the actions of the snake
+    :return: (seconds per rebuild, seconds per incremental update)
+    """
+    rebuild_time = update_time = 0.0
+    for action in actions:
+        # move the snake and process the tick up to the board update, as World.run_tick does
+        world.snake.move(action)
+        world._update_free_cells()
+        world._check_food()
+
+        start = time.perf_counter()
+        board = rebuild(world)
+        rebuild_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        world._update_board()
+        update_time += time.perf_counter() - start
+
+    if not np.array_equal(board, world.board):
+        raise RuntimeError("The incremental board update differs from the rebuilt board")
+
+    return rebuild_time / len(actions), update_time / len(actions)
+
+
+def main():
+    """
+    Main function printing the time per board update for each board size and snake length
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the board update of World.run_tick")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'board':>10} {'length':>8} {'rebuild (us)':>14} {'incremental (us)':>18}")
+    for width, height in BOARD_SIZES:
+        for length in LENGTHS:
+            if length >= width * height:
+                continue
+
+            # the snake continues the sweep it was grown with
+            world = make_world(width, height, length)
+            actions = list(serpentine(width, length - 1 + args.repeat))[length - 1:]
+            rebuild_time, update_time = time_updates(world, actions)
+
+            print(f"{width:>4}x{height:<5} {length:>8} {rebuild_time * 1e6:>14.1f} {update_time * 1e6:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
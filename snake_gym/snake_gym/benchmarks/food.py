@@ -0,0 +1,52 @@
+#
+# File: benchmarks/food.py
+# Desc: Benchmark of World.place_food across board sizes and snake lengths
+#
+#####################################################
+
+import argparse
+import random
+from snake_gym.benchmarks.helpers import make_world, time_call
+
+BOARD_SIZES = [(20, 15), (50, 50), (100, 100), (200, 200)]
+LENGTHS = [2, 50, 250, 1000]
+
+
+def place_food_list(world):
+    """
+    The food placement as it was done before: list every cell and remove the body parts
+    :param world: the world to place food in
+    """
+    all_coords = [[x, y] for x in range(world.board.shape[0]) for y in range(world.board.shape[1])]
+
+    for part in world.snake.body:
+        all_coords.remove(list(part))
+
+    world.food_location = random.choice(all_coords)
+
+
+def main():
+    """
+    Main function printing the time per food placement for each board size and snake length
+    """
+    parser = argparse.ArgumentParser(description="Benchmark World.place_food")
+    parser.add_argument("--repeat", type=int, default=10000)
+    parser.add_argument("--list-repeat", type=int, default=5,
+                        help="repeats of the old list based placement, which is a lot slower")
+    args = parser.parse_args()
+
+    print(f"{'board':>10} {'length':>8} {'list (us)':>12} {'free cells (us)':>16}")
+    for width, height in BOARD_SIZES:
+        for length in LENGTHS:
+            if length >= width * height:
+                continue
+
+            world = make_world(width, height, length, seed=0)
+            list_time = time_call(lambda: place_food_list(world), args.list_repeat)
+            index_time = time_call(world.place_food, args.repeat)
+
+            print(f"{width:>4}x{height:<5} {length:>8} {list_time * 1e6:>12.1f} {index_time * 1e6:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#
+# File: benchmarks/helpers.py
+# Desc: Helper functions shared by the benchmarks
+#
+#####################################################
+
+import time
+from snake_gym.config import EnvConfig
+from snake_gym.game.actions import Actions
+from snake_gym.game.snake import Snake
+from snake_gym.game.world import World
+
+
+def serpentine(width, steps):
+    """
+    Generator of actions that let a snake sweep the board row by row without hitting itself
+    :param width: the width of the board
+    :param steps: the number of actions to generate
+    """
+    direction = Actions.RIGHT
+    for i in range(steps):
+
+        # go down at the end of every row and turn around
+        if i % width == width - 1:
+            yield Actions.DOWN
+            direction = Actions.LEFT if direction == Actions.RIGHT else Actions.RIGHT
+        else:
+            yield direction
+
+
+def make_world(width, height, length, **kwargs):
+    """
+    Function to create a headless world with a snake of (at least) the given length
+    :param width: the width of the board
+    :param height: the height of the board
+    :param length: the length of the snake
+    :param kwargs: additional arguments for the World
+    :return: World
+    """
+    config = EnvConfig(width=width, height=height, initial_length=length)
+    snake = Snake(config)
+    world = World(snake, config, headless=True, **kwargs)
+
+    for action in serpentine(width, length - 1):
+        snake.move(action)
+        world.run_tick()
+
+    return world
+
+
+def time_call(function, repeat):
+    """
+    Function to measure the average duration of a call
+    :param function: the function to call without arguments
+    :param repeat: the number of calls
+    :return: seconds per call
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+
+    return (time.perf_counter() - start) / repeat
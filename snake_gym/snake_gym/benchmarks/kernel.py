@@ -0,0 +1,111 @@
+#
+# File: benchmarks/kernel.py
+# Desc: Parity check and benchmark of the compiled step kernel against the Python Env
+#
+#####################################################
+
+import argparse
+import random
+import time
+import numpy as np
+from snake_gym.config import EnvConfig
+from snake_gym.env import Env
+from snake_gym.kernel_env import KernelEnv
+
+CONFIGS = [EnvConfig(), EnvConfig(width=5, height=4), EnvConfig(width=7, height=30, initial_length=6),
+           EnvConfig(width=50, height=50, start_position=(10, 3))]
+
+
+def check_parity(config, seed, steps):
+    """
+    Function to play the same random actions in an Env and a KernelEnv with the same seed and
+    check that every state, reward, board and food location is exactly the same
+    :param config: the configuration of the game
+    :param seed: seed for the food placement and the actions
+    :param steps: the number of steps to play
+    :return: the number of games played
+    """
+    env = Env(human_player=False, config=config, headless=True, seed=seed)
+    kernel_env = KernelEnv(config, seed=seed)
+    actions = random.Random(seed)
+
+    # both are reset once, as training does before the first episode
+    results = [_reset(env), _reset(kernel_env)]
+    games = 1
+    for step in range(steps):
+        (state, reward, done, _, info), (kernel_state, kernel_reward, kernel_done, _, kernel_info) = results
+
+        # every value has to be identical, not just close
+        if not np.array_equal(state, kernel_state) or reward != kernel_reward or done != kernel_done \
+                or info != kernel_info:
+            raise RuntimeError(f"Step {step} differs with {config} and seed {seed}: "
+                               f"{(state.tolist(), reward, done, info)} != "
+                               f"{(kernel_state.tolist(), kernel_reward, kernel_done, kernel_info)}")
+
+        if not np.array_equal(env.world.board, kernel_env.board):
+            raise RuntimeError(f"Board differs after step {step} with {config} and seed {seed}")
+
+        if done:
+            results = [_reset(env), _reset(kernel_env)]
+            games += 1
+        else:
+            action = actions.randrange(3)
+            results = [env.step(action), kernel_env.step(action)]
+
+    return games
+
+
+def _reset(env):
+    """
+    Private function to reset an environment, shaped like the result of a step
+    :param env: the environment
+    :return: (state, None, False, False, info)
+    """
+    state, info = env.reset()
+    return state, None, False, False, info
+
+
+def steps_per_second(env, steps):
+    """
+    Function to measure how many random steps per second an environment plays, resetting it when a game ends
+    :param env: the environment
+    :param steps: the number of steps
+    :return: steps per second
+    """
+    actions = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, done, _, _ = env.step(actions.randrange(3))
+        if done:
+            env.reset()
+
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Main function checking the parity of the kernel and printing the steps/sec of both environments
+    """
+    parser = argparse.ArgumentParser(description="Check and benchmark the compiled step kernel")
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--parity-steps", type=int, default=20_000)
+    parser.add_argument("--steps", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # the first environment compiles the kernels, which should not be timed
+    compiled = KernelEnv().compiled
+    print(f"kernel is {'compiled with Numba' if compiled else 'plain Python (Numba is not installed)'}")
+
+    for config in CONFIGS:
+        games = sum(check_parity(config, seed, args.parity_steps) for seed in range(args.seeds))
+        print(f"parity {config.width}x{config.height}: {args.seeds * args.parity_steps} steps "
+              f"over {games} games identical")
+
+    env_speed = steps_per_second(Env(human_player=False, headless=True, seed=0), args.steps)
+    kernel_speed = steps_per_second(KernelEnv(seed=0), args.steps)
+    print(f"       Env: {env_speed:10.0f} steps/sec")
+    print(f" KernelEnv: {kernel_speed:10.0f} steps/sec ({kernel_speed / env_speed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#
+# File: benchmarks/observations.py
+# Desc: Benchmark of the throughput of the observation encoders, on their own and inside the environments
+#
+#####################################################
+
+import argparse
+import random
+import time
+import numpy as np
+from snake_gym.config import EnvConfig
+from snake_gym.env import Env
+from snake_gym.vector_env import VectorEnv
+from snake_gym.benchmarks.helpers import make_world, time_call
+
+BOARD_SIZES = [(20, 15), (50, 50), (100, 100)]
+OBSERVATIONS = [None, "grid", "egocentric", "rays"]
+
+
+def env_steps_per_second(observation, config, steps):
+    """
+    Function to measure how many random steps per second an Env plays with an observation encoder
+    :param observation: the name of the encoder, None for the default state
+    :param config: the configuration of the game
+    :param steps: the number of steps
+    :return: steps per second
+    """
+    env = Env(human_player=False, config=config, headless=True, seed=0, observation=observation)
+    actions = random.Random(0)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, done, _, _ = env.step(actions.randrange(3))
+        if done:
+            env.reset()
+
+    return steps / (time.perf_counter() - start)
+
+
+def vector_steps_per_second(observation, config, num_envs, steps):
+    """
+    Function to measure how many game steps per second a VectorEnv plays with an observation encoder
+    :param observation: the name of the encoder, None for the default states
+    :param config: the configuration of the games
+    :param num_envs: the number of games
+    :param steps: the number of batched steps
+    :return: game steps per second
+    """
+    env = VectorEnv(num_envs, config, seed=0, observation=observation)
+    actions = np.random.default_rng(0).integers(0, 3, size=(steps, num_envs))
+
+    start = time.perf_counter()
+    for step in range(steps):
+        env.step(actions[step])
+
+    return steps * num_envs / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Main function printing the time per encoded state and the step rate of the environments per encoder
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the observation encoders")
+    parser.add_argument("--repeat", type=int, default=10_000)
+    parser.add_argument("--steps", type=int, default=20_000)
+    parser.add_argument("--num-envs", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'board':>9} {'observation':>12} {'encode (us)':>12} {'batched (us/game)':>18} "
+          f"{'Env (steps/s)':>14} {'VectorEnv (steps/s)':>20}")
+    for width, height in BOARD_SIZES:
+        config = EnvConfig(width=width, height=height)
+
+        # a long snake, so the encoders see a realistic board
+        world = make_world(width, height, min(50, width * height // 2))
+        boards = np.repeat(world.board[None], args.num_envs, axis=0)
+        heads = np.repeat([world.snake.head_coords], args.num_envs, axis=0)
+        directions = np.full(args.num_envs, world.snake.direction.value)
+
+        for name in OBSERVATIONS:
+            encode, batched = float("nan"), float("nan")
+            if name is not None:
+                encoder = Env(human_player=False, config=config, headless=True, observation=name).observation
+                encode = time_call(lambda: encoder(world.board, world.snake.head_coords,
+                                                   world.snake.direction.value), args.repeat)
+                batched = time_call(lambda: encoder.batch(boards, heads, directions),
+                                    max(1, args.repeat // args.num_envs)) / args.num_envs
+
+            env_speed = env_steps_per_second(name, config, args.steps)
+            vector_speed = vector_steps_per_second(name, config, args.num_envs, max(1, args.steps // args.num_envs))
+
+            print(f"{width:>4}x{height:<4} {str(name):>12} {encode * 1e6:>12.2f} {batched * 1e6:>18.3f} "
+                  f"{env_speed:>14.0f} {vector_speed:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
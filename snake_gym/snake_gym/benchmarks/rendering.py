@@ -0,0 +1,56 @@
+#
+# File: benchmarks/rendering.py
+# Desc: Benchmark of Env.step throughput with and without rendering
+#
+#####################################################
+
+import argparse
+import os
+import random
+import time
+
+# allow the rendered benchmark to run on machines without a display
+if "DISPLAY" not in os.environ:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from snake_gym import Env
+
+
+def run(headless, steps, render_every=1):
+    """
+    Function to measure the number of environment steps per second
+    :param headless: whether the environment is headless
+    :param steps: the number of steps to take
+    :param render_every: draw every n steps, only used when not headless
+    :return: steps per second
+    """
+    env = Env(human_player=False, headless=headless, render_every=render_every)
+    env.reset()
+    actions = [random.randrange(3) for _ in range(steps)]
+
+    start = time.perf_counter()
+    for action in actions:
+        _, _, done, _, _ = env.step(action)
+        if done:
+            env.reset()
+
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Main function printing the steps per second for each rendering mode
+    """
+    parser = argparse.ArgumentParser(description="Benchmark Env.step with and without rendering")
+    parser.add_argument("--steps", type=int, default=5000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for name, headless, render_every in [("headless", True, 1),
+                                         ("render every 10", False, 10),
+                                         ("render every step", False, 1)]:
+        print(f"{name:>20}: {run(headless, args.steps, render_every):10.0f} steps/sec")
+
+
+if __name__ == "__main__":
+    main()
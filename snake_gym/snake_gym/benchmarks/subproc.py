@@ -0,0 +1,83 @@
+#
+# File: benchmarks/subproc.py
+# Desc: Benchmark of the scaling of SubprocVectorEnv with the number of worker processes
+#
+#####################################################
+
+import argparse
+import os
+import time
+import numpy as np
+from snake_gym import Env
+from snake_gym.subproc import SubprocVectorEnv
+
+
+def loop_steps_per_second(num_envs, steps):
+    """
+    Function to measure how many game steps per second a list of Env instances plays in this process
+    :param num_envs: the number of games
+    :param steps: the number of batched steps
+    :return: game steps per second
+    """
+    envs = [Env(human_player=False, headless=True, seed=seed) for seed in range(num_envs)]
+    actions = np.random.default_rng(0).integers(0, 3, size=(steps, num_envs)).tolist()
+
+    start = time.perf_counter()
+    for step in range(steps):
+        for env, action in zip(envs, actions[step]):
+            _, _, done, _, _ = env.step(action)
+            if done:
+                env.reset()
+
+    return steps * num_envs / (time.perf_counter() - start)
+
+
+def subproc_steps_per_second(num_envs, num_workers, steps):
+    """
+    Function to measure how many game steps per second a SubprocVectorEnv plays
+    :param num_envs: the number of games
+    :param num_workers: the number of worker processes
+    :param steps: the number of batched steps
+    :return: game steps per second
+    """
+    actions = np.random.default_rng(0).integers(0, 3, size=(steps, num_envs))
+
+    with SubprocVectorEnv(num_envs, num_workers, seed=0) as env:
+        env.reset()
+
+        start = time.perf_counter()
+        for step in range(steps):
+            env.step(actions[step])
+
+        return steps * num_envs / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Main function printing the steps per second of a SubprocVectorEnv for 1 to N workers
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the scaling of SubprocVectorEnv")
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, os.cpu_count() or 1} & set(range(1, (os.cpu_count() or 1) + 1))))
+    parser.add_argument("--steps", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    print(f"{'games':>6} {'workers':>10} {'steps/sec':>12} {'speedup':>8}")
+    for num_envs in args.num_envs:
+
+        # the same games played one after the other in this process
+        baseline = loop_steps_per_second(num_envs, args.steps)
+        print(f"{num_envs:>6} {'in process':>10} {baseline:>12.0f} {1:>7.2f}x")
+
+        for num_workers in args.workers:
+            if num_workers > num_envs:
+                continue
+
+            speed = subproc_steps_per_second(num_envs, num_workers, args.steps)
+            print(f"{num_envs:>6} {num_workers:>10} {speed:>12.0f} {speed / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#
+# File: benchmarks/suite.py
+# Desc: Benchmark suite of the hot paths of the game, written to JSON to track regressions
+#
+#####################################################
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+
+# allow the rendered benchmarks to run on machines without a display
+if "DISPLAY" not in os.environ:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from snake_gym import Env
+from snake_gym.config import EnvConfig
+from snake_gym.vector_env import VectorEnv
+from snake_gym.benchmarks.helpers import make_world, serpentine, time_call
+
+BOARD_SIZES = ["20x15", "50x50", "100x100"]
+LENGTHS = [2, 50, 250]
+NUM_ENVS = [1, 16, 256]
+
+# the fields that identify a result, results of two runs with the same key are compared
+KEY = ("benchmark", "board", "length", "mode", "num_envs")
+
+
+def grown_env(width, height, length, steps, headless=True):
+    """
+    Function to create an env with a snake of (at least) the given length, and the actions that
+    continue its sweep of the board without hitting itself
+    :param width: the width of the board
+    :param height: the height of the board
+    :param length: the length of the snake
+    :param steps: the number of actions to return
+    :param headless: whether the env is headless, the snake is grown headless either way
+    :return: (env, snapshot of the grown game, actions)
+    """
+    config = EnvConfig(width=width, height=height, initial_length=length)
+    actions = list(serpentine(width, length - 1 + steps))
+
+    # the snake of a human player takes the absolute actions of the sweep
+    env = Env(human_player=True, config=config, headless=True, seed=0)
+    for action in actions[:length - 1]:
+        env.step(action)
+    snapshot = env.get_state_snapshot()
+
+    if not headless:
+        env = Env(human_player=True, config=config, headless=False, seed=0)
+        env.restore(snapshot)
+
+    return env, snapshot, actions[length - 1:]
+
+
+def time_steps(env, actions, snapshot, rounds):
+    """
+    Function to measure the duration of Env.step, restoring the game whenever it ends without timing that
+    :param env: the env
+    :param actions: the actions to take every round
+    :param snapshot: the game state every round starts from
+    :param rounds: the number of rounds
+    :return: median over the rounds of the seconds per step
+    """
+    timings = []
+    for _ in range(rounds):
+        env.restore(snapshot)
+        total = 0.0
+        for action in actions:
+            start = time.perf_counter()
+            _, _, done, _, _ = env.step(action)
+            total += time.perf_counter() - start
+            if done:
+                env.restore(snapshot)
+
+        timings.append(total / len(actions))
+
+    return statistics.median(timings)
+
+
+def time_median(function, repeat, rounds):
+    """
+    Function to measure the duration of a call as the median over a few rounds
+    :param function: the function to call without arguments
+    :param repeat: the number of calls per round
+    :param rounds: the number of rounds
+    :return: seconds per call
+    """
+    return statistics.median(time_call(function, repeat) for _ in range(rounds))
+
+
+def result(benchmark, seconds, board, length=None, mode="headless", num_envs=1):
+    """
+    Function to create a result entry
+    :param benchmark: the name of what was measured
+    :param seconds: the seconds per call
+    :param board: the board size as WxH
+    :param length: the length of the snake, if it matters
+    :param mode: headless or rendered
+    :param num_envs: the number of games stepped per call
+    :return: dict
+    """
+    return {"benchmark": benchmark, "board": board, "length": length, "mode": mode, "num_envs": num_envs,
+            "seconds": seconds, "steps_per_second": num_envs / seconds}
+
+
+def run_suite(board_sizes, lengths, num_envs, repeat, render_repeat, rounds):
+    """
+    Generator of the results of every benchmark
+    :param board_sizes: the board sizes as WxH
+    :param lengths: the lengths of the snake
+    :param num_envs: the numbers of games of the VectorEnv
+    :param repeat: the number of calls per round
+    :param render_repeat: the number of calls per round of the rendered benchmarks, which are a lot slower
+    :param rounds: the number of rounds, the median of which is reported
+    """
+    for board in board_sizes:
+        width, height = map(int, board.split("x"))
+
+        for length in lengths:
+            if length >= width * height // 2:
+                continue
+
+            # the step, headless and drawn on every step
+            env, snapshot, actions = grown_env(width, height, length, repeat)
+            yield result("Env.step", time_steps(env, actions, snapshot, rounds), board, length)
+
+            env, snapshot, actions = grown_env(width, height, length, render_repeat, headless=False)
+            yield result("Env.step", time_steps(env, actions, snapshot, rounds), board, length, "rendered")
+
+            # the parts of the step, on the grown game
+            env.restore(snapshot)
+            yield result("Env._get_state", time_median(env._get_state, repeat, rounds), board, length)
+            yield result("Env._get_reward", time_median(lambda: env._get_reward(False, False, env._food_dist + 1),
+                                                        repeat, rounds), board, length)
+
+            world = make_world(width, height, length, seed=0)
+            yield result("World.place_food", time_median(world.place_food, repeat, rounds), board, length)
+
+        # a reset starts a new snake, so it only depends on the board
+        env = Env(human_player=False, config=EnvConfig(width=width, height=height), headless=True, seed=0)
+        yield result("Env.reset", time_median(env.reset, repeat, rounds), board)
+
+        # a single agent env against a VectorEnv, with random actions, per call of step
+        rng = np.random.default_rng(0)
+        single_actions = rng.integers(0, 3, repeat).tolist()
+        env.reset()
+        yield result("Env.step (random)", time_steps(env, single_actions, env.get_state_snapshot(), rounds), board)
+
+        for n in num_envs:
+            vector_env = VectorEnv(n, EnvConfig(width=width, height=height), seed=0)
+            batches = iter(rng.integers(0, 3, (repeat * rounds, n)))
+            seconds = time_median(lambda: vector_env.step(next(batches)), repeat, rounds)
+            yield result("VectorEnv.step (random)", seconds, board, num_envs=n)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Function to print the change of every result against a previous run
+    :param results: the results of this run
+    :param baseline: the results of the previous run
+    :param tolerance: the fraction a benchmark may slow down before it counts as a regression
+    :return: the number of regressions
+    """
+    previous = {tuple(entry[k] for k in KEY): entry["seconds"] for entry in baseline}
+
+    regressions = 0
+    print(f"\n{'benchmark':>24} {'board':>8} {'length':>7} {'mode':>9} {'envs':>5} {'change':>8}")
+    for entry in results:
+        key = tuple(entry[k] for k in KEY)
+        if key not in previous:
+            continue
+
+        change = entry["seconds"] / previous[key] - 1
+        regressed = change > tolerance
+        regressions += regressed
+        print(f"{entry['benchmark']:>24} {entry['board']:>8} {str(entry['length'] or '-'):>7} {entry['mode']:>9} "
+              f"{entry['num_envs']:>5} {change * 100:>+7.1f}%{'  REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def main():
+    """
+    Main function printing the time per call of every benchmark and writing them to JSON
+    Exits with status 1 if --compare found a regression
+    """
+    parser = argparse.ArgumentParser(description="Benchmark suite of Env, World and VectorEnv")
+    parser.add_argument("--json", help="file to write the results to")
+    parser.add_argument("--compare", help="results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown, as a fraction, that counts as a regression when comparing")
+    parser.add_argument("--boards", nargs="+", default=BOARD_SIZES)
+    parser.add_argument("--lengths", nargs="+", type=int, default=LENGTHS)
+    parser.add_argument("--envs", nargs="+", type=int, default=NUM_ENVS)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--render-repeat", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'benchmark':>24} {'board':>8} {'length':>7} {'mode':>9} {'envs':>5} {'time (us)':>10} {'steps/s':>10}")
+    results = []
+    for entry in run_suite(args.boards, args.lengths, args.envs, args.repeat, args.render_repeat, args.rounds):
+        results.append(entry)
+        print(f"{entry['benchmark']:>24} {entry['board']:>8} {str(entry['length'] or '-'):>7} {entry['mode']:>9} "
+              f"{entry['num_envs']:>5} {entry['seconds'] * 1e6:>10.2f} {entry['steps_per_second']:>10.0f}")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "arguments": vars(args),
+                "results": results,
+            }, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
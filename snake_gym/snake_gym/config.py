@@ -0,0 +1,49 @@
+#
+# File: config.py
+# Desc: The configuration of a snake game
+#
+######################
+
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass
+class EnvConfig:
+    """
+    Configuration of a game, passed from the Env to the World and the Snake
+    :param width: the width of the board
+    :param height: the height of the board
+    :param initial_length: the length of the snake at the start of a game
+    :param start_position: the [x, y] coordinates the snake starts at, defaults to the middle of the left border
+    :param board_dtype: the dtype of the board, which only holds 0 (empty), 1 (snake) and 2 (food)
+    """
+    width: int = 20
+    height: int = 15
+    initial_length: int = 2
+    start_position: tuple = None
+    board_dtype: type = np.int8
+
+    def __post_init__(self):
+
+        if self.width < 2 or self.height < 2:
+            raise ValueError(f"The board should be at least 2x2, got {self.width}x{self.height}")
+
+        if self.initial_length < 1:
+            raise ValueError(f"The initial length should be at least 1, got {self.initial_length}")
+
+        if self.start_position is None:
+            self.start_position = (0, self.height // 2)
+
+        x, y = self.start_position
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"The start position {self.start_position} is not on the "
+                             f"{self.width}x{self.height} board")
+
+    @property
+    def board_shape(self):
+        """
+        The shape of the board
+        :return: (width, height)
+        """
+        return self.width, self.height
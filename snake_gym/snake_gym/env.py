@@ -4,67 +4,200 @@
 ######################
 
 import math
+import time
+import numpy as np
+from snake_gym.config import EnvConfig
 from snake_gym.game.snake import Snake, AgentSnake
 from snake_gym.game.world import World
-from snake_gym.game.actions import Actions, AgentActions
+from snake_gym.game.actions import Actions, AGENT_MOVES
+from snake_gym.game.geometry import food_delta, food_angle
+from snake_gym.observations import make_observation, FrameStack
 
+# the Gymnasium API is optional, without it an Env works the same but has no spaces and can't be registered
+try:
+    import gymnasium
+    from gymnasium import spaces
+except ImportError:
+    gymnasium = None
+    spaces = None
 
-class Env:
+# version of the snapshot layout, stored in the snapshot header
+SNAPSHOT_VERSION = 1
+
+# the header of a snapshot, stored as int32 values in this order
+SNAPSHOT_HEADER = ("version", "width", "height", "length", "direction", "food_x", "food_y", "ticks",
+                   "body_size", "free_size")
+
+# random.Random stores 624 words and an index, which all fit in 32 bits
+RNG_STATE_SIZE = 625
+
+
+class Env(gymnasium.Env if gymnasium is not None else object):
     """
-    A gym environment for the Snake game
+    A gym environment for the Snake game, with the Gymnasium API
     """
-    def __init__(self, human_player=False):
+    metadata = {"render_modes": ["human"], "render_fps": 25}
+
+    def __init__(self, human_player=False, config: EnvConfig = None, headless=False, render_every=1, seed=None,
+                 observation=None, frames=1, render_mode=None, record=None):
+        """
+        Constructor
+        :param human_player: whether the snake is controlled by a human or by an agent
+        :param config: the configuration of the game, defaults to EnvConfig()
+        :param headless: if True, the game is not drawn on every step and pygame is never initialized,
+                         unless render() is called
+        :param render_every: draw the game every n steps, only used when not headless
+        :param seed: seed for the food placement
+        :param observation: None for the food angle and neighbour state, otherwise the name of an
+                            encoder in snake_gym.observations.OBSERVATIONS or an encoder
+        :param frames: the number of observations to stack, only used with an observation encoder
+        :param render_mode: "human" to draw the game, None for headless, overrides headless when given
+        :param record: file to record every episode to, see record()
+        """
 
         self.human_player = human_player
+        self.config = config or EnvConfig()
+
+        # gymnasium.make passes the render mode
+        if render_mode is not None:
+            if render_mode not in self.metadata["render_modes"]:
+                raise ValueError(f"Unknown render mode {render_mode!r}, choose from {self.metadata['render_modes']}")
+            headless = False
+        self.render_mode = None if headless else "human"
+
+        # the observation encoder and the stack of its last frames, if any
+        self.observation = None if observation is None else make_observation(observation, self.config)
+        self._frames = None
+        if self.observation is not None and frames > 1:
+            self._frames = FrameStack(frames, self.observation.shape, self.observation.dtype)
 
         # create snake
-        if human_player:
-            self.snake = Snake()
-        else:
-            self.snake = AgentSnake()
+        self.snake = self._create_snake()
 
         # create world
-        self.world = World(self.snake)
+        self.world = World(self.snake, self.config, headless=headless, render_every=render_every, seed=seed)
 
         # draw environment
         self.world.run_tick()
 
+        # the wrapped difference from the head to the food and its length, updated once per step
+        self._food_delta = (0, 0)
+        self._food_dist = 0.0
+        self._update_food_delta()
+
+        # the function the seconds spent computing every state are reported to, if any
+        self._observe_timer = None
+
+        # the current state, which is returned again when the game ends
+        self._state = self._observe(reset=True)
+
+        # the spaces of the Gymnasium API, the actions are relative for an agent and absolute for a human
+        self.action_space = None
+        self.observation_space = None
+        if spaces is not None:
+            self.action_space = spaces.Discrete(len(Actions) if human_player else 3)
+            self.observation_space = self._make_observation_space()
+
+        # the recorder of the episodes, if any
+        self._recorder = None
+        if record is not None:
+            self.record(record)
+
     def step(self, action):
         """
         Method to perform an action given a state
+        The game has no step limit, so it is never truncated, register() adds one
         :param action: the action to perform
-        :return: [next_state, reward, done]
+        :return: (next_state, reward, terminated, truncated, info)
         """
 
-        # get state
-        current_state = self._get_state()
-
-        # save snake head
-        prev_location = self.snake.head_coords.copy()
+        # save the distance to the food before moving
+        prev_dist = self._food_dist
 
-        # move the snake
+        # move the snake, a human player can also pass the value of an action
+        if self.human_player:
+            action = Actions(action)
         self.snake.move(action)
 
         # run a game tick in the world
         food_capture, done = self.world.run_tick()
 
-        reward = self._get_reward(food_capture, done, prev_location)
+        # compute the distance to the food once, it is used by both the reward and the state
+        self._update_food_delta()
+
+        reward = self._get_reward(food_capture, done, prev_dist)
 
         # get next state, unless we're done, then we use the old one
-        if done:
-            next_state = current_state
-        else:
-            next_state = self._get_state()
+        if not done:
+            self._state = self._observe()
+
+        if self._recorder is not None:
+            self._recorder.step(action.value if self.human_player else action, reward, done)
 
         # return the environment information
-        return next_state, reward, done
+        return self._state, reward, done, False, {"food": food_capture, "length": self.snake.length}
+
+    def render(self):
+        """
+        Method to draw the current state of the game on demand
+        :return: None
+        """
+        self.world.render()
 
     def get_state_size(self):
         """
         Method to retrieve the state size, used to initialize agent network
         :return:
         """
-        return len(self._get_state())
+        return int(np.prod(self.get_observation_shape()))
+
+    def get_observation_shape(self):
+        """
+        Method to retrieve the shape of the states, used to initialize networks that take more than a vector
+        :return: shape as tuple
+        """
+        return np.shape(self._state)
+
+    def time_observations(self, timer):
+        """
+        Method to report the time spent computing the states, e.g. to profile training
+        :param timer: function called with the seconds of every state computation, None to stop
+        :return: None
+        """
+        self._observe_timer = timer
+
+    def _observe(self, reset=False):
+        """
+        Private method to compute the state that is returned to the agent, timed if requested
+        :param reset: whether this is the first state of a game, which fills the stack of frames
+        :return: state
+        """
+        if self._observe_timer is None:
+            return self._encode(reset)
+
+        start = time.perf_counter()
+        state = self._encode(reset)
+        self._observe_timer(time.perf_counter() - start)
+        return state
+
+    def _encode(self, reset):
+        """
+        Private method to compute the state that is returned to the agent
+        :param reset: whether this is the first state of a game, which fills the stack of frames
+        :return: state
+        """
+        if self.observation is None:
+            return np.array(self._get_state(), dtype=np.float32)
+
+        frame = self.observation(self.world.board, self.snake.head_coords, self.snake.direction.value)
+        if self._frames is None:
+            return frame
+
+        # the stacked frames are a view that changes with the next push
+        if reset:
+            return self._frames.reset(frame).copy()
+
+        return self._frames.push(frame).copy()
 
     def _get_state(self):
         """
@@ -81,13 +214,9 @@ class Env:
         # create new state
         state = []
 
-        # get the angle to the fruit of the closest fruit
+        # get the angle to the closest fruit
         # as the snake can traverse borders, a fruit might be closer behind the borders
-        # first get closest food
-        food_coords = self.get_closest_food_coords(self.snake.head_coords)
-
-        # calculate angle to that food
-        angle = self._calc_food_angle(food_coords)
+        angle = food_angle(self._food_delta[0], self._food_delta[1], self.snake.direction)
 
         # add the angle to the state
         state.append(angle)
@@ -96,13 +225,10 @@ class Env:
         x, y = self.snake.head_coords
 
         # check if we would collide upon taking any of the actions
-        for a in range(3):
-
-            # get coordinate difference wrt direction
-            dir = AgentActions.convert(self.snake.direction, a)
+        for dx, dy, _ in AGENT_MOVES[self.snake.direction]:
 
             # add the direction
-            coord = self.snake.clip([x + dir[0], y + dir[1]])
+            coord = self.snake.clip([x + dx, y + dy])
 
             # add coordinates to snake head and check if there is a 1 on the board
             # body collision
@@ -113,9 +239,12 @@ class Env:
 
         return state
 
-    def _get_reward(self, food_capture, done, old_coord):
+    def _get_reward(self, food_capture, done, old_dist):
         """
         Function to calculate the reward given a state
+        :param food_capture: whether the snake got food
+        :param done: whether the snake collided
+        :param old_dist: the distance to the closest food before the snake moved
         """
 
         # first we check if the snake managed to get food
@@ -126,131 +255,187 @@ class Env:
         if done:
             return -1
 
-        # set reward for moving closer/further from food
-        old_dist = self.get_closest_food_distance(old_coord)
-        new_dist = self.get_closest_food_distance(self.snake.head_coords)
-
         # check if closer or further from food
-        if old_dist > new_dist:
+        if old_dist > self._food_dist:
             return 0.1
         else:
             return -0.2
 
-    def _calc_food_angle(self, food_coord):
+    def _update_food_delta(self):
         """
-        Method to get the angle of the head to the food
-        :return: angle (normalized)
+        Method to compute the wrapped difference from the snake head to the food and its length
         """
+        self._food_delta = food_delta(self.snake.head_coords, self.world.food_location,
+                                      self.config.width, self.config.height)
+        self._food_dist = math.sqrt(self._food_delta[0] ** 2 + self._food_delta[1] ** 2)
 
-        # get direction to define starting point of angle
-        # maybe dictionary to convert direction list to degrees
-        rad = math.atan2(self.snake.head_coords[1] - food_coord[1], self.snake.head_coords[0] - food_coord[0])
+    def get_closest_food_distance(self, head_coords):
+        """
+        Method to retrieve the distance to the closest food from a snake head location
+        :param head_coords: the coordinates of the snake head
+        :return: distance
+        """
+        dx, dy = food_delta(head_coords, self.world.food_location, self.config.width, self.config.height)
+        return math.sqrt(dx ** 2 + dy ** 2)
 
-        # convert radians to angle
-        angle = math.degrees(rad)
+    def get_closest_food_coords(self, head_coords):
+        """
+        Method to retrieve the coordinates of the closest piece of food, which may lie across a border
+        :param head_coords: the coordinates of the snake head
+        :return: coordinates as (x, y)
+        """
+        dx, dy = food_delta(head_coords, self.world.food_location, self.config.width, self.config.height)
+        return head_coords[0] + dx, head_coords[1] + dy
 
-        # keep angle in same domain
-        angle = (angle + 360) % 360
+    @staticmethod
+    def euclidian_distance_measure(a, b):
+        """
+        Distance measure function
+        :param a: first coordinate in [x1, y1]
+        :param b: second coordinate in [x2, y2]
+        :return: Euclidian distance
+        """
+        return math.sqrt(abs(a[0] - b[0]) ** 2 + abs(a[1] - b[1]) ** 2)
 
-        # convert direction to degrees
-        dir_conv = {Actions.UP: 90, Actions.LEFT: -180, Actions.DOWN: -90, Actions.RIGHT: 0}
+    def reset(self, seed=None, options=None):
+        """
+        Method to reset the game and retrieve the first state
+        :param seed: seed for the food placement from now on, the generator continues when None
+        :param options: unused, part of the Gymnasium API
+        :return: (state, info)
+        """
+        if seed is not None:
+            self.seed(seed)
 
-        # move origin
-        angle += dir_conv[self.snake.direction]
-        angle = (angle + 180) % 360
+        # seeds the np_random of gymnasium.Env, which the game doesn't use
+        if gymnasium is not None:
+            super().reset(seed=seed)
 
-        # now normalize everything over 180 should be negative
-        if angle > 180:
-            angle = (angle - 180) * -1
+        # create snake
+        self.snake = self._create_snake()
 
-            # normalize
-            angle = -1 - (angle / 180)
+        # reset world with new snake
+        self.world.reset(self.snake)
+        self._update_food_delta()
 
-        # normalize everything below 180
-        else:
-            angle = angle / 180
+        # return a state
+        self._state = self._observe(reset=True)
+        if self._recorder is not None:
+            self._recorder.start(self)
 
-        return angle
+        return self._state, {"length": self.snake.length}
 
-    def _calc_food_distances(self, coords):
+    def seed(self, seed=None):
         """
-        Method to calculate the shortest distance to the food
-
-        This method needs to take into account the fact that the snake can travel
-        across the borders of the grid. Hence, it returns a list of distances to
-        the piece of food approached from each of the borders
+        Method to seed the random number generator of this environment, which places the food
+        :param seed: the seed
+        :return: None
+        """
+        self.world.rng.seed(seed)
 
-        :param coords: the coordinates of the snake head
+    def get_state_snapshot(self):
+        """
+        Method to capture the full game state: the body, direction, food, free cells and the
+        state of the random number generator. Restoring it continues the game exactly as it would have
+        :return: snapshot as bytes
+        """
+        rng_version, rng_words, gauss_next = self.world.rng.getstate()
+        body = self.snake.body
+        free_cells = self.world._free_cells
+
+        header = np.array([SNAPSHOT_VERSION, self.config.width, self.config.height, self.snake.length,
+                           self.snake.direction.value, self.world.food_location[0], self.world.food_location[1],
+                           self.world.ticks, len(body), len(free_cells)], dtype=np.int32)
+
+        return b"".join([
+            header.tobytes(),
+            np.array(body, dtype=np.int16).tobytes(),
+            np.array(free_cells, dtype=np.int32).tobytes(),
+            np.array(rng_words, dtype=np.uint32).tobytes(),
+            np.array([np.nan if gauss_next is None else gauss_next], dtype=np.float64).tobytes(),
+        ])
+
+    def restore(self, snapshot):
+        """
+        Method to restore a game state captured with get_state_snapshot
+        :param snapshot: the snapshot as bytes
+        :return: state
         """
-        # get shape size of the board
-        x, y = self.world.board.shape
+        header = dict(zip(SNAPSHOT_HEADER, np.frombuffer(snapshot, dtype=np.int32, count=len(SNAPSHOT_HEADER))))
 
-        # keep track of all the distances, start with the normal screen
-        distances = {tuple(self.world.food_location): self.euclidian_distance_measure(coords, self.world.food_location)}
+        if header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header['version']}")
 
-        # create an array of the difference in coordinates of the different screens
-        screens = [[0, y], [0, -y], [x, 0], [-x, 0]]
+        if (header["width"], header["height"]) != self.config.board_shape:
+            raise ValueError(f"Snapshot of a {header['width']}x{header['height']} board does not fit "
+                             f"the {self.config.width}x{self.config.height} board of this environment")
 
-        # loop over difference for each screen
-        for diff in screens:
+        # read the arrays that follow the header
+        offset = len(SNAPSHOT_HEADER) * 4
+        body = np.frombuffer(snapshot, dtype=np.int16, count=2 * header["body_size"], offset=offset)
+        offset += body.nbytes
+        free_cells = np.frombuffer(snapshot, dtype=np.int32, count=header["free_size"], offset=offset)
+        offset += free_cells.nbytes
+        rng_words = np.frombuffer(snapshot, dtype=np.uint32, count=RNG_STATE_SIZE, offset=offset)
+        offset += rng_words.nbytes
+        gauss_next = float(np.frombuffer(snapshot, dtype=np.float64, count=1, offset=offset)[0])
 
-            # calculate the food coord in the adjacent screen
-            food_coord = [x + y for x, y in zip(self.world.food_location, diff)]
+        # restore the snake and the world around it
+        self.snake = self._create_snake()
+        self.snake.restore(body.reshape(-1, 2).tolist(), int(header["length"]), Actions(header["direction"]))
 
-            # calculate the distance to the food on the adjacent screen
-            distances[tuple(food_coord)] = self.euclidian_distance_measure(coords, food_coord)
+        rng_state = (3, tuple(rng_words.tolist()), None if math.isnan(gauss_next) else gauss_next)
+        self.world.restore(self.snake, [int(header["food_x"]), int(header["food_y"])], free_cells.tolist(),
+                           rng_state, int(header["ticks"]))
 
-        # return the minimal distance as coordinate, distance dict
-        return distances
+        self._update_food_delta()
+        self._state = self._observe(reset=True)
+        if self._recorder is not None:
+            self._recorder.start(self)
 
-    def get_closest_food_distance(self, head_coords):
+        return self._state
+
+    def record(self, filepath):
         """
-        Method to retrieve the closest food from the current snake head location
-        :return:
+        Method to record every episode from the current state on, as the snapshot of its first state and
+        its actions, appended to a file that snake_gym.recording.EpisodePlayer plays back
+        :param filepath: the file
+        :return: None
         """
+        from snake_gym.recording import EpisodeRecorder
 
-        # calculate the food coordinate distances
-        dist = self._calc_food_distances(head_coords)
-
-        # get the minimum value from the dict values
-        return min(dist.values())
+        self.close()
+        self._recorder = EpisodeRecorder(filepath)
+        self._recorder.start(self)
 
-    def get_closest_food_coords(self, head_coords):
+    def close(self):
         """
-        Method to retrieve the coordinates of the closest piece of food
-        :param head_coords:
-        :return:
+        Method to stop recording, the episode that is being recorded is written as cut off
+        :return: None
         """
-        # get the distance dictionary
-        dist = self._calc_food_distances(head_coords)
-
-        # get the key of the lowest dict value
-        return min(dist, key=dist.get)
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
 
-    @staticmethod
-    def euclidian_distance_measure(a, b):
+    def _make_observation_space(self):
         """
-        Distance measure function
-        :param a: first coordinate in [x1, y1]
-        :param b: second coordinate in [x2, y2]
-        :return: Euclidian distance
+        Private method to describe the states as a Gymnasium space
+        :return: Box
         """
-        return math.sqrt(abs(a[0] - b[0]) ** 2 + abs(a[1] - b[1]) ** 2)
+        shape = self.get_observation_shape()
+
+        # the food angle and the neighbours lie in [-1, 1]
+        if self.observation is None:
+            return spaces.Box(-1, 1, shape, np.float32)
+
+        return spaces.Box(self.observation.low, self.observation.high, shape, self.observation.dtype)
 
-    def reset(self):
+    def _create_snake(self):
         """
-        Method to reset the game and retrieve the first state
-        :return: state
+        Private method to create a new snake of the type that matches the player
+        :return: Snake
         """
-
-        # create snake
         if self.human_player:
-            self.snake = Snake()
-        else:
-            self.snake = AgentSnake()
-
-        # reset world with new snake
-        self.world.reset(self.snake)
+            return Snake(self.config)
 
-        # return a state
-        return self._get_state()
+        return AgentSnake(self.config)
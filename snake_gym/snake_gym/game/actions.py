@@ -36,26 +36,36 @@ class AgentActions:
         :param action: the relative action taken
         :return: array of relative movement
         """
+        dx, dy, _ = AGENT_MOVES[direction][action]
+        return [dx, dy]
 
-        # map current direction to relative movement
-        relative_movement = action_space[direction]
 
-        # swap the actions if the snake turns left/right
-        if action != 1:
+def _relative_movement(direction, action):
+    """
+    Function to compute the movement of a relative action, used to build the lookup tables
+    :param direction: the current direction
+    :param action: the relative action taken
+    :return: (dx, dy)
+    """
+
+    # map current direction to relative movement
+    dx, dy = action_space[direction]
 
-            # check if index is on 0, if so we invert
-            if not relative_movement.index(0):
-                relative_movement = list(np.array(relative_movement) * -1)
+    # swap the actions if the snake turns left/right
+    if action != 1:
 
-            # change direction
-            relative_movement = [relative_movement[1], relative_movement[0]]
+        # check if the x movement is 0, if so we invert
+        if dx == 0:
+            dx, dy = -dx, -dy
 
-        # if the snake turns right, we have the same operations as before (left), but we need to invert it
-        if action == 0:
-            relative_movement = list(np.array(relative_movement) * -1)
+        # change direction
+        dx, dy = dy, dx
 
-        # map back to action to get the absolute direction
-        return relative_movement
+    # if the snake turns right, we have the same operations as before (left), but we need to invert it
+    if action == 0:
+        dx, dy = -dx, -dy
+
+    return dx, dy
 
 
 # a dictionary that converts the action space to relative movement
@@ -72,3 +82,18 @@ movement_space = {
     (-1, 0): Actions.LEFT,
     (1, 0): Actions.RIGHT
 }
+
+# a lookup table that converts (direction, relative action) to (dx, dy, new direction)
+AGENT_MOVES = {}
+for _direction in Actions:
+    _moves = []
+    for _action in range(3):
+        _dx, _dy = _relative_movement(_direction, _action)
+        _moves.append((_dx, _dy, movement_space[(_dx, _dy)]))
+    AGENT_MOVES[_direction] = tuple(_moves)
+
+# the same table as arrays indexed by [Actions.value, relative action], for batches of snakes
+AGENT_MOVE_DELTAS = np.array([[move[:2] for move in AGENT_MOVES[direction]] for direction in Actions],
+                             dtype=np.int64)
+AGENT_MOVE_DIRECTIONS = np.array([[move[2].value for move in AGENT_MOVES[direction]] for direction in Actions],
+                                 dtype=np.int64)
@@ -0,0 +1,99 @@
+#
+# File: game/geometry.py
+# Desc: Distances and angles on the wrapping board
+#
+#####################################################
+
+import math
+import numpy as np
+from .actions import Actions
+
+# convert direction to degrees
+DIRECTION_DEGREES = {Actions.UP: 90, Actions.LEFT: -180, Actions.DOWN: -90, Actions.RIGHT: 0}
+
+# the same conversion as an array indexed by Actions.value, for batches of directions
+DIRECTION_DEGREES_ARRAY = np.array([DIRECTION_DEGREES[direction] for direction in Actions], dtype=np.float64)
+
+
+def food_delta(head, food, width, height):
+    """
+    Function to get the difference in coordinates from the head to the closest piece of food.
+    As the snake can traverse borders, the food might be closer across a border, in which case
+    the difference is wrapped around the board
+    :param head: the coordinates of the snake head in [x, y]
+    :param food: the coordinates of the food in [x, y]
+    :param width: the width of the board
+    :param height: the height of the board
+    :return: (dx, dy)
+    """
+    dx = food[0] - head[0]
+    dy = food[1] - head[1]
+
+    # only cross a border if that is strictly shorter
+    if 2 * abs(dx) > width:
+        dx -= width if dx > 0 else -width
+
+    if 2 * abs(dy) > height:
+        dy -= height if dy > 0 else -height
+
+    return dx, dy
+
+
+def food_deltas(heads, foods, width, height):
+    """
+    Function to get the wrapped difference in coordinates for a batch of heads, see food_delta
+    :param heads: the coordinates of the snake heads [batch_size x 2]
+    :param foods: the coordinates of the food [batch_size x 2]
+    :param width: the width of the board
+    :param height: the height of the board
+    :return: deltas [batch_size x 2]
+    """
+    size = np.array([width, height])
+    deltas = foods - heads
+
+    return np.where(2 * np.abs(deltas) > size, deltas - np.sign(deltas) * size, deltas)
+
+
+def food_angle(dx, dy, direction):
+    """
+    Function to get the angle of the head to the food, seen from the direction of the snake
+    :param dx: the difference in x coordinate from the head to the food
+    :param dy: the difference in y coordinate from the head to the food
+    :param direction: the direction of the snake
+    :return: angle (normalized)
+    """
+
+    # the angle of the head to the food, converted from radians
+    angle = math.degrees(math.atan2(-dy, -dx))
+
+    # keep angle in same domain
+    angle = (angle + 360) % 360
+
+    # move origin
+    angle += DIRECTION_DEGREES[direction]
+    angle = (angle + 180) % 360
+
+    # now normalize everything over 180 should be negative
+    if angle > 180:
+        angle = (angle - 180) * -1
+
+        # normalize
+        return -1 - (angle / 180)
+
+    # normalize everything below 180
+    return angle / 180
+
+
+def food_angles(deltas, directions):
+    """
+    Function to get the angle of the head to the food for a batch of snakes, see food_angle
+    :param deltas: the differences in coordinates from the heads to the food [batch_size x 2]
+    :param directions: the directions of the snakes as Actions values [batch_size]
+    :return: angles [batch_size]
+    """
+    angle = np.degrees(np.arctan2(-deltas[:, 1], -deltas[:, 0]))
+    angle = (angle + 360) % 360
+    angle += DIRECTION_DEGREES_ARRAY[directions]
+    angle = (angle + 180) % 360
+
+    return np.where(angle > 180, -1 - ((angle - 180) * -1) / 180, angle / 180)
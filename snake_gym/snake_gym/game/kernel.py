@@ -0,0 +1,286 @@
+#
+# File: game/kernel.py
+# Desc: The dynamics of a single agent game as kernels over arrays, compiled with Numba when available
+#
+#####################################################
+
+import math
+import numpy as np
+from .actions import Actions, AGENT_MOVE_DELTAS, AGENT_MOVE_DIRECTIONS
+from .geometry import DIRECTION_DEGREES_ARRAY
+
+try:
+    from numba import njit
+    KERNEL_COMPILED = True
+except ImportError:
+    KERNEL_COMPILED = False
+
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit that leaves the function as plain Python
+        """
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+
+        return lambda function: function
+
+
+# the scalars of a game, stored in a single int64 array in this order
+HEAD_SLOT, COUNT, LENGTH, DIRECTION, HEAD_X, HEAD_Y, FOOD_X, FOOD_Y, NUM_FREE = range(9)
+NUM_SCALARS = 9
+
+# the same conversion as math.degrees
+RAD_TO_DEG = 180.0 / math.pi
+
+
+@njit(cache=True)
+def take_cell(free_cells, free_slots, scalars, cell):
+    """
+    Function to remove a cell from the free cells by swapping it with the last free cell, see World._take_cell
+    :param free_cells: the free cells in arbitrary order [width * height]
+    :param free_slots: the position of every cell in free_cells, -1 if taken [width * height]
+    :param scalars: the scalars of the game
+    :param cell: the flat cell number
+    """
+    slot = free_slots[cell]
+
+    # the cell might already be taken when the snake collides with itself
+    if slot < 0:
+        return
+
+    scalars[NUM_FREE] -= 1
+    last = free_cells[scalars[NUM_FREE]]
+    if last != cell:
+        free_cells[slot] = last
+        free_slots[last] = slot
+
+    free_slots[cell] = -1
+
+
+@njit(cache=True)
+def release_cell(free_cells, free_slots, scalars, cell):
+    """
+    Function to add a cell to the free cells, see World._release_cell
+    :param free_cells: the free cells in arbitrary order [width * height]
+    :param free_slots: the position of every cell in free_cells, -1 if taken [width * height]
+    :param scalars: the scalars of the game
+    :param cell: the flat cell number
+    """
+    if free_slots[cell] < 0:
+        free_slots[cell] = scalars[NUM_FREE]
+        free_cells[scalars[NUM_FREE]] = cell
+        scalars[NUM_FREE] += 1
+
+
+@njit(cache=True)
+def step_kernel(board, body, free_cells, free_slots, scalars, action, deltas, directions, degrees, state):
+    """
+    Function to move the snake of a single game, as AgentSnake.move followed by World.run_tick, and observe
+    the new state. The food is not placed again when it is eaten, as that draws from the random number
+    generator, so the state and distance have to be observed again after placing it
+    :param board: the board (0 empty, 1 snake, 2 food) [width x height]
+    :param body: ring buffer with the body coordinates [width * height x 2]
+    :param free_cells: the free cells in arbitrary order [width * height]
+    :param free_slots: the position of every cell in free_cells, -1 if taken [width * height]
+    :param scalars: the scalars of the game
+    :param action: the relative action
+    :param deltas: AGENT_MOVE_DELTAS
+    :param directions: AGENT_MOVE_DIRECTIONS
+    :param degrees: DIRECTION_DEGREES_ARRAY
+    :param state: the array to write the state to, it is left as is when the snake collides [4]
+    :return: (food_capture, collision, distance from the head to the food)
+    """
+    width, height = board.shape
+    capacity = body.shape[0]
+    direction = scalars[DIRECTION]
+
+    # turn and move the head, wrapping around the borders
+    x = (scalars[HEAD_X] + deltas[direction, action, 0]) % width
+    y = (scalars[HEAD_Y] + deltas[direction, action, 1]) % height
+    scalars[DIRECTION] = directions[direction, action]
+    scalars[HEAD_X] = x
+    scalars[HEAD_Y] = y
+
+    # the tail leaves its cell first, unless the snake is still growing, so the head may move into it
+    if scalars[COUNT] >= scalars[LENGTH]:
+        tail = (scalars[HEAD_SLOT] - scalars[COUNT] + 1) % capacity
+        tail_x = body[tail, 0]
+        tail_y = body[tail, 1]
+        board[tail_x, tail_y] = 0
+        scalars[COUNT] -= 1
+        release_cell(free_cells, free_slots, scalars, tail_x * height + tail_y)
+
+    collision = board[x, y] == 1
+
+    scalars[HEAD_SLOT] = (scalars[HEAD_SLOT] + 1) % capacity
+    body[scalars[HEAD_SLOT], 0] = x
+    body[scalars[HEAD_SLOT], 1] = y
+    scalars[COUNT] += 1
+    board[x, y] = 1
+    take_cell(free_cells, free_slots, scalars, x * height + y)
+
+    # the snake grows on its next move
+    food_capture = x == scalars[FOOD_X] and y == scalars[FOOD_Y]
+    if food_capture:
+        scalars[LENGTH] += 1
+
+    # the state is only observed while the game goes on, as in Env.step
+    if collision:
+        return food_capture, collision, food_distance(board, scalars)
+
+    return food_capture, collision, observe_kernel(board, scalars, deltas, degrees, state)
+
+
+@njit(cache=True)
+def food_delta_kernel(board, scalars):
+    """
+    Function to get the difference from the head to the food, only crossing a border if that is strictly
+    shorter, see food_delta
+    :param board: the board [width x height]
+    :param scalars: the scalars of the game
+    :return: (dx, dy)
+    """
+    width, height = board.shape
+    dx = scalars[FOOD_X] - scalars[HEAD_X]
+    dy = scalars[FOOD_Y] - scalars[HEAD_Y]
+    if 2 * abs(dx) > width:
+        dx -= width if dx > 0 else -width
+    if 2 * abs(dy) > height:
+        dy -= height if dy > 0 else -height
+
+    return dx, dy
+
+
+@njit(cache=True)
+def food_distance(board, scalars):
+    """
+    Function to get the distance from the head to the food
+    :param board: the board [width x height]
+    :param scalars: the scalars of the game
+    :return: distance
+    """
+    dx, dy = food_delta_kernel(board, scalars)
+    return math.sqrt(dx ** 2 + dy ** 2)
+
+
+@njit(cache=True)
+def observe_kernel(board, scalars, deltas, degrees, state):
+    """
+    Function to compute the state of a single game, as Env._get_state, and the distance to the food
+    :param board: the board (0 empty, 1 snake, 2 food) [width x height]
+    :param scalars: the scalars of the game
+    :param deltas: AGENT_MOVE_DELTAS
+    :param degrees: DIRECTION_DEGREES_ARRAY
+    :param state: the array to write the state to [4]
+    :return: the distance from the head to the food
+    """
+    width, height = board.shape
+    x = scalars[HEAD_X]
+    y = scalars[HEAD_Y]
+    direction = scalars[DIRECTION]
+
+    dx, dy = food_delta_kernel(board, scalars)
+
+    # the angle of the head to the food, seen from the direction of the snake, see food_angle
+    angle = math.atan2(-dy, -dx) * RAD_TO_DEG
+    angle = (angle + 360) % 360
+    angle += degrees[direction]
+    angle = (angle + 180) % 360
+    if angle > 180:
+        state[0] = -1 - ((angle - 180) * -1) / 180
+    else:
+        state[0] = angle / 180
+
+    # check if we would collide upon taking any of the actions
+    for action in range(3):
+        state[1 + action] = board[(x + deltas[direction, action, 0]) % width,
+                                  (y + deltas[direction, action, 1]) % height] == 1
+
+    return math.sqrt(dx ** 2 + dy ** 2)
+
+
+class KernelGame:
+    """
+    A single agent game stored as arrays, stepped by the kernels above.
+    Only the food placement runs in Python, with the same random number generator calls as World,
+    so a KernelGame and an Env with the same seed play exactly the same game
+    """
+
+    def __init__(self, width, height, start_position, initial_length, board_dtype, rng):
+        """
+        Constructor
+        :param width: the width of the board
+        :param height: the height of the board
+        :param start_position: the coordinates the snake starts at
+        :param initial_length: the length of the snake at the start
+        :param board_dtype: the dtype of the board
+        :param rng: random.Random used to place food
+        """
+        self.start_position = start_position
+        self.initial_length = initial_length
+        self.rng = rng
+
+        self.board = np.zeros((width, height), dtype=board_dtype)
+        self.body = np.zeros((width * height, 2), dtype=np.int64)
+        self.free_cells = np.zeros(width * height, dtype=np.int64)
+        self.free_slots = np.zeros(width * height, dtype=np.int64)
+        self.scalars = np.zeros(NUM_SCALARS, dtype=np.int64)
+
+    def reset(self):
+        """
+        Method to put a new snake at the start position and place the food
+        """
+        x, y = self.start_position
+        height = self.board.shape[1]
+
+        self.body[0] = x, y
+        self.scalars[:] = 0
+        self.scalars[COUNT] = 1
+        self.scalars[LENGTH] = self.initial_length
+        self.scalars[DIRECTION] = Actions.RIGHT.value
+        self.scalars[HEAD_X] = x
+        self.scalars[HEAD_Y] = y
+
+        self.free_cells[:] = np.arange(self.board.size)
+        self.free_slots[:] = np.arange(self.board.size)
+        self.scalars[NUM_FREE] = self.board.size
+        take_cell(self.free_cells, self.free_slots, self.scalars, x * height + y)
+
+        self.board.fill(0)
+        self.board[x, y] = 1
+        self.place_food()
+
+    def step(self, action, state):
+        """
+        Method to move the snake, place new food when it was eaten and observe the new state
+        :param action: the relative action
+        :param state: the array to write the state to, it is left as is when the snake collides [4]
+        :return: (food_capture, collision, distance from the head to the food)
+        """
+        food_capture, collision, distance = step_kernel(self.board, self.body, self.free_cells, self.free_slots,
+                                                        self.scalars, action, AGENT_MOVE_DELTAS,
+                                                        AGENT_MOVE_DIRECTIONS, DIRECTION_DEGREES_ARRAY, state)
+        if food_capture:
+            self.place_food()
+            distance = self.observe(state)
+
+        return food_capture, collision, distance
+
+    def observe(self, state):
+        """
+        Method to write the state of the game into an array
+        :param state: the array to write the state to [4]
+        :return: the distance from the head to the food
+        """
+        return observe_kernel(self.board, self.scalars, AGENT_MOVE_DELTAS, DIRECTION_DEGREES_ARRAY, state)
+
+    def place_food(self):
+        """
+        Method to place the food on one of the cells that are not taken by the snake, see World.place_food
+        """
+        height = self.board.shape[1]
+        cell = int(self.free_cells[self.rng.randrange(int(self.scalars[NUM_FREE]))])
+
+        self.scalars[FOOD_X] = cell // height
+        self.scalars[FOOD_Y] = cell % height
+        self.board[cell // height, cell % height] = 2
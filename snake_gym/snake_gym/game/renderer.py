@@ -0,0 +1,65 @@
+#
+# File: game/renderer.py
+# Desc: The pygame renderer used to draw the world
+#
+#####################################################
+
+import pygame
+import numpy as np
+from .colors import Colors
+
+SCREEN_RATIO = 30
+
+
+class Renderer:
+    """
+    Class that draws a board onto a pygame display.
+    It is only created when something actually needs to be drawn, so headless
+    worlds never initialize pygame.
+    """
+
+    def __init__(self, board_shape):
+        """
+        Initialization method
+        :param board_shape: the (width, height) of the board that will be drawn
+        """
+
+        # initialize pygame
+        pygame.init()
+
+        # multiply by SCREEN_RATIO pixels to get total screen size
+        screen_size = (board_shape[0] * SCREEN_RATIO, board_shape[1] * SCREEN_RATIO)
+
+        # create screen
+        self.display = pygame.display.set_mode(screen_size, 0, 32)
+
+    def draw(self, board):
+        """
+        Method to draw the board using the pygame interface.
+        :param board: the board to draw, 1 denotes the snake and 2 denotes food
+        """
+
+        # start with black background
+        self.display.fill(Colors.BLACK)
+
+        # only visit the occupied cells instead of walking the whole grid
+        for i, j in np.argwhere(board == 1):
+            self._draw_cell(i, j, Colors.WHITE)
+
+        for i, j in np.argwhere(board == 2):
+            self._draw_cell(i, j, Colors.RED)
+
+        # update display
+        pygame.display.update()
+
+    def _draw_cell(self, i, j, color):
+        """
+        Private method to draw a single cell of the board
+        :param i: the x coordinate of the cell
+        :param j: the y coordinate of the cell
+        :param color: the color of the cell
+        """
+        pygame.draw.rect(self.display, color,
+                         pygame.Rect(i * SCREEN_RATIO,
+                                     j * SCREEN_RATIO,
+                                     SCREEN_RATIO - 2, SCREEN_RATIO - 2))
@@ -5,8 +5,9 @@
 #
 ########################
 
-from .actions import action_space, movement_space, Actions, AgentActions
-import numpy as np
+from collections import deque
+from .actions import action_space, Actions, AGENT_MOVES
+from ..config import EnvConfig
 
 
 class Snake:
@@ -14,20 +15,32 @@ class Snake:
         Class that represents the snake that can be controlled by the user
     """
 
-    def __init__(self, initial_length=2, board: np.ndarray = np.zeros((20, 15))):
+    def __init__(self, config: EnvConfig = None):
         """
         Initialization method
+        :param config: the configuration of the game, defaults to EnvConfig()
         """
+        config = config or EnvConfig()
+
         # store the board width and length
-        self.width = board.shape[0]
-        self.height = board.shape[1]
+        self.width = config.width
+        self.height = config.height
 
         # store head coordinates
-        self.head_coords = [0, 7]
-        self.length = initial_length
+        self.head_coords = list(config.start_position)
+        self.length = config.initial_length
+
+        # keep track of the past head coordinates to create the snake, the head is at the front
+        self.body = deque([tuple(self.head_coords)])
+
+        # the cells taken by the body, so collisions are checked without scanning the body
+        self.occupied = {tuple(self.head_coords)}
 
-        # keep track of the past head coordinates to create the snake
-        self.body = [self.head_coords]
+        # the cell the tail left during the last move, if any
+        self.last_tail = None
+
+        # whether the head moved into the body during the last move
+        self.collided = False
 
         # we need the direction to
         self.direction = Actions.RIGHT
@@ -42,19 +55,49 @@ class Snake:
         self.direction = action
 
         # convert action to relative movement
-        relative_movement = action_space[action]
+        dx, dy = action_space[action]
 
         # move the head in the direction specified by changes in coordinates
-        next_location = [sum(pair) for pair in zip(self.head_coords, relative_movement)]
+        next_location = [self.head_coords[0] + dx, self.head_coords[1] + dy]
 
         # clip the next location to get the new head coords
         self.head_coords = self.clip(next_location)
 
         # now move the body
-        self.body.insert(0, self.head_coords)
+        self._advance()
+
+    def restore(self, body, length, direction):
+        """
+        Method to put the snake back in a previously captured state
+        :param body: the coordinates of the body parts, starting at the head
+        :param length: the length of the snake
+        :param direction: the direction of the snake
+        """
+        self.body = deque(tuple(part) for part in body)
+        self.occupied = set(self.body)
+        self.head_coords = list(self.body[0])
+        self.length = length
+        self.direction = direction
+        self.last_tail = None
+        self.collided = False
+
+    def _advance(self):
+        """
+        Private method to let the body follow the head to its new coordinates
+        """
+        head = tuple(self.head_coords)
 
-        # trim the body
-        self.body = self.body[:self.length]
+        # the tail leaves its cell first, unless the snake is still growing, so the head may move into it
+        if len(self.body) >= self.length:
+            self.last_tail = self.body.pop()
+            self.occupied.discard(self.last_tail)
+        else:
+            self.last_tail = None
+
+        self.collided = head in self.occupied
+
+        self.body.appendleft(head)
+        self.occupied.add(head)
 
     def clip(self, next_location):
         """
@@ -83,30 +126,27 @@ class AgentSnake(Snake):
 
     There is a different move function implemented
     """
-    def __init__(self, initial_length=2, board: np.ndarray = np.zeros((20, 15))):
+    def __init__(self, config: EnvConfig = None):
         """
         Constructor
+        :param config: the configuration of the game, defaults to EnvConfig()
         """
         # call parent
-        super().__init__(initial_length, board)
+        super().__init__(config)
 
     def move(self, action):
         """
         Move functions for the agent work slightly different
         """
 
-        # convert to the direction
-        relative_movement = AgentActions.convert(self.direction, action)
-        self.direction = movement_space[tuple(relative_movement)]
+        # look up the movement and the new direction
+        dx, dy, self.direction = AGENT_MOVES[self.direction][action]
 
         # move the head in the direction specified by changes in coordinates
-        next_location = [sum(pair) for pair in zip(self.head_coords, relative_movement)]
+        next_location = [self.head_coords[0] + dx, self.head_coords[1] + dy]
 
         # clip the next location to get the new head coords
         self.head_coords = self.clip(next_location)
 
         # now move the body
-        self.body.insert(0, self.head_coords)
-
-        # trim the body
-        self.body = self.body[:self.length]
+        self._advance()
@@ -5,39 +5,56 @@
 #
 #####################################################
 
-import pygame
 import numpy as np
-from .colors import Colors
 from .snake import Snake
+from ..config import EnvConfig
 import random
 
-SCREEN_RATIO = 30
-
 
 class World:
     """
     Class that represents the environment in which the game will be played
     """
 
-    def __init__(self, snake: Snake, board: np.ndarray = np.zeros((20, 15))):
+    def __init__(self, snake: Snake, config: EnvConfig = None, headless=False, render_every=1,
+                 debug=False, seed=None):
+        """
+        Initialization method
+        :param snake: the snake that lives in this world
+        :param config: the configuration of the game, defaults to EnvConfig()
+        :param headless: if True, the world is never drawn automatically and pygame is not initialized
+        :param render_every: draw the world every n ticks, only used when not headless
+        :param debug: if True, the board and free cells are checked against a full rebuild on every tick
+        :param seed: seed for the food placement
+        """
 
-        # initialize pygame
-        pygame.init()
+        # store the variables, the board is updated in place so every world allocates its own
+        self.config = config or EnvConfig()
+        self.snake = snake
+        self.board = np.zeros(self.config.board_shape, dtype=self.config.board_dtype)
+        self.debug = debug
+        self.headless = headless
+        self.render_every = render_every
 
-        # multiply by SCREEN_RATIO pixels to get total screen size
-        screen_size = (board.shape[0] * SCREEN_RATIO, board.shape[1] * SCREEN_RATIO)
+        # the renderer is created on the first draw, so headless worlds never touch pygame
+        self.renderer = None
+        self.ticks = 0
 
-        # create screen
-        self.display = pygame.display.set_mode(screen_size, 0, 32)
+        # random number generator used to place food
+        self.rng = random.Random(seed)
 
-        # store the variables
-        self.snake = snake
-        self.board = board
+        # index of the cells that are not taken by the snake, stored as flat cell numbers.
+        # _free_cells holds the free cells in arbitrary order and _free_slots maps a cell to
+        # its position in _free_cells (-1 if taken), so cells are taken and released in O(1)
+        self._free_cells = []
+        self._free_slots = []
+        self._fill_free_cells()
 
         # place food upon initialization
         self.food_location = None
 
         self.place_food()
+        self._fill_board(self.board)
 
     def run_tick(self):
         """
@@ -49,6 +66,9 @@ class World:
         # Process game information #
         ############################
 
+        # the snake moved, so the cells it left and took change
+        self._update_free_cells()
+
         # check if snake eats food
         food_capture = self._check_food()
 
@@ -59,21 +79,19 @@ class World:
         # Process the board        #
         ############################
 
-        # start by clearing the board
-        self._clear()
+        # only the cells of the head, the tail and the food change
+        self._update_board()
 
-        # get body coordinates
-        for part in self.snake.body:
-            self.board[part[0]][part[1]] = 1
-
-        # get food location
-        self.board[self.food_location[0]][self.food_location[1]] = 2
+        if self.debug:
+            self._check_board()
 
         ############################
         # Draw the board           #
         ############################
 
-        self._draw()
+        self.ticks += 1
+        if not self.headless and self.ticks % self.render_every == 0:
+            self.render()
 
         # if we reach this we can continue the game
         return food_capture, collision
@@ -83,23 +101,105 @@ class World:
         Method to place a bit of food on the board
         """
 
-        # get all possible coordinates
-        all_coords = [[x, y] for x in range(self.board.shape[0]) for y in range(self.board.shape[1])]
+        # pick one of the cells that are not taken by the snake body
+        cell = self._free_cells[self.rng.randrange(len(self._free_cells))]
+        self.food_location = [cell // self.board.shape[1], cell % self.board.shape[1]]
+
+    def _fill_free_cells(self):
+        """
+        Private method to build the index of free cells from the snake body
+        """
+        self._free_cells = list(range(self.board.size))
+        self._free_slots = list(range(self.board.size))
+
+        for part in self.snake.occupied:
+            self._take_cell(part)
+
+    def _update_free_cells(self):
+        """
+        Private method to update the index of free cells after the snake moved
+        """
+
+        # release the tail first, the head might have moved into its cell
+        if self.snake.last_tail is not None:
+            self._release_cell(self.snake.last_tail)
+
+        self._take_cell(self.snake.head_coords)
+
+    def _take_cell(self, coords):
+        """
+        Private method to remove a cell from the free cells by swapping it with the last free cell
+        :param coords: the coordinates of the cell
+        """
+        cell = coords[0] * self.board.shape[1] + coords[1]
+        slot = self._free_slots[cell]
+
+        # the cell might already be taken when the snake collides with itself
+        if slot < 0:
+            return
+
+        last = self._free_cells.pop()
+        if last != cell:
+            self._free_cells[slot] = last
+            self._free_slots[last] = slot
 
-        # remove the snake bodt from all coords
+        self._free_slots[cell] = -1
+
+    def _release_cell(self, coords):
+        """
+        Private method to add a cell to the free cells
+        :param coords: the coordinates of the cell
+        """
+        cell = coords[0] * self.board.shape[1] + coords[1]
+
+        if self._free_slots[cell] < 0:
+            self._free_slots[cell] = len(self._free_cells)
+            self._free_cells.append(cell)
+
+    def _update_board(self):
+        """
+        Private method to update the board after the snake moved.
+        Only the cell the tail left, the new head and the food are written
+        """
+
+        # clear the tail first, the head or the food might have moved into its cell
+        if self.snake.last_tail is not None:
+            self.board[self.snake.last_tail[0], self.snake.last_tail[1]] = 0
+
+        self.board[self.snake.head_coords[0], self.snake.head_coords[1]] = 1
+        self.board[self.food_location[0], self.food_location[1]] = 2
+
+    def _fill_board(self, board):
+        """
+        Private method to write the complete game state into a board
+        :param board: the board to fill
+        """
+        board.fill(0)
+
+        # get body coordinates
         for part in self.snake.body:
-            all_coords.remove(part)
+            board[part[0], part[1]] = 1
 
-        # pick one for placing food
-        self.food_location = random.choice(all_coords)
+        # get food location
+        board[self.food_location[0], self.food_location[1]] = 2
 
-    def _clear(self):
+    def _check_board(self):
         """
-        Private method to clear the world of the previous state.
-        We need this method because the snake will keep moving, so we should not remember it's previous
-        locations
+        Private method to check the incrementally updated board and free cells against a full rebuild
         """
-        self.board = np.zeros(self.board.shape)
+        expected = np.zeros_like(self.board)
+        self._fill_board(expected)
+
+        if not np.array_equal(self.board, expected):
+            raise RuntimeError(f"Board is out of sync with the game state at tick {self.ticks + 1}")
+
+        # the free cells should be exactly the cells without a body part
+        free = np.flatnonzero(expected != 1)
+        if len(free) != len(self._free_cells) or not np.array_equal(np.sort(self._free_cells), free):
+            raise RuntimeError(f"Free cells are out of sync with the game state at tick {self.ticks + 1}")
+
+        if any(self._free_slots[cell] != slot for slot, cell in enumerate(self._free_cells)):
+            raise RuntimeError(f"Free cell positions are out of sync at tick {self.ticks + 1}")
 
     def _check_food(self):
         """
@@ -124,40 +224,43 @@ class World:
         Private method to check if the snake collides with itself
         :return: boolean denoting whether the snake has collided or not
         """
-        # check if the snake head hits any part of the body (that is not the head)
-        return self.snake.head_coords in self.snake.body[1:]
+        # the snake keeps track of whether its head moved into the body
+        return self.snake.collided
 
-    def _draw(self):
+    def render(self):
         """
         Method to draw the world using the pygame interface.
+        Can be called on demand, also when the world is headless.
         """
 
-        # start with black background
-        self.display.fill(Colors.BLACK)
+        # pygame is imported on the first draw only
+        if self.renderer is None:
+            from .renderer import Renderer
+            self.renderer = Renderer(self.board.shape)
 
-        # extract the shape
-        x, y = self.board.shape
+        self.renderer.draw(self.board)
 
-        # we set x-1 and y-1 to refrain from drawing the border
-        for i in range(x):
-            for j in range(y):
-
-                # draw snake part
-                if self.board[i, j] == 1:
-                    pygame.draw.rect(self.display, Colors.WHITE,
-                                     pygame.Rect(i*SCREEN_RATIO,
-                                                 j*SCREEN_RATIO,
-                                                 SCREEN_RATIO - 2, SCREEN_RATIO - 2))
+    def restore(self, snake, food_location, free_cells, rng_state, ticks):
+        """
+        Method to put the world back in a previously captured state
+        :param snake: the restored snake
+        :param food_location: the coordinates of the food
+        :param free_cells: the free cells, in the order of the index
+        :param rng_state: the state of the random number generator, as returned by random.Random.getstate
+        :param ticks: the number of ticks played
+        """
+        self.snake = snake
+        self.food_location = food_location
+        self.ticks = ticks
+        self.rng.setstate(rng_state)
 
-                # draw food
-                elif self.board[i, j] == 2:
-                    pygame.draw.rect(self.display, Colors.RED,
-                                     pygame.Rect(i * SCREEN_RATIO,
-                                                 j * SCREEN_RATIO,
-                                                 SCREEN_RATIO - 2, SCREEN_RATIO - 2))
+        # the order of the free cells matters for the next food placement, so it is restored as is
+        slots = np.full(self.board.size, -1, dtype=np.int64)
+        slots[free_cells] = np.arange(len(free_cells))
+        self._free_cells = list(free_cells)
+        self._free_slots = slots.tolist()
 
-        # update display
-        pygame.display.update()
+        self._fill_board(self.board)
 
     def reset(self, snake):
         """
@@ -168,6 +271,10 @@ class World:
 
         # inherit the snake
         self.snake = snake
+        self._fill_free_cells()
 
         # place new food
         self.place_food()
+
+        # the old game is still on the board, so rebuild it completely
+        self._fill_board(self.board)
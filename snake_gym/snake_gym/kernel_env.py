@@ -0,0 +1,120 @@
+#
+# File: kernel_env.py
+# Desc: A headless agent environment that runs every step as a single compiled kernel
+#
+######################
+
+import random
+import numpy as np
+from snake_gym.config import EnvConfig
+from snake_gym.env import Env, spaces
+from snake_gym.game.kernel import KernelGame, KERNEL_COMPILED, LENGTH
+
+
+def make_agent_env(config: EnvConfig = None, seed=None):
+    """
+    Function to create the fastest headless environment for an agent. Both play exactly the same games
+    :param config: the configuration of the game, defaults to EnvConfig()
+    :param seed: seed for the food placement
+    :return: a KernelEnv when Numba is installed, otherwise a headless Env
+    """
+    if KERNEL_COMPILED:
+        return KernelEnv(config, seed=seed)
+
+    return Env(human_player=False, config=config, headless=True, seed=seed)
+
+
+class KernelEnv:
+    """
+    A headless Snake environment for agents with the same interface and the same games as Env.
+
+    The game is stored as arrays and every step runs as a kernel compiled with Numba. Without Numba
+    the kernels run as plain Python, which gives the same results but is slower than Env.
+    """
+
+    def __init__(self, config: EnvConfig = None, seed=None):
+        """
+        Constructor
+        :param config: the configuration of the game, defaults to EnvConfig()
+        :param seed: seed for the food placement, an Env with the same seed plays the same game
+        """
+        self.config = config or EnvConfig()
+        self.compiled = KERNEL_COMPILED
+        self.rng = random.Random(seed)
+        self.game = KernelGame(self.config.width, self.config.height, self.config.start_position,
+                               self.config.initial_length, self.config.board_dtype, self.rng)
+
+        # the current state and distance to the food, the state is returned again when the game ends
+        self._state = np.zeros(4, dtype=np.float32)
+        self._food_dist = 0.0
+
+        self.game.reset()
+        self._food_dist = self.game.observe(self._state)
+
+        # the same spaces as the Env of an agent
+        self.action_space = None
+        self.observation_space = None
+        if spaces is not None:
+            self.action_space = spaces.Discrete(3)
+            self.observation_space = spaces.Box(-1, 1, self._state.shape, np.float32)
+
+    def step(self, action):
+        """
+        Method to perform an action given a state
+        :param action: the action to perform
+        :return: (next_state, reward, terminated, truncated, info) as returned by Env.step
+        """
+
+        # save the distance to the food before moving
+        prev_dist = self._food_dist
+
+        # the state is only updated while the game goes on, the distance always
+        food_capture, done, self._food_dist = self.game.step(action, self._state)
+
+        # the same rewards as Env._get_reward
+        if food_capture:
+            reward = 1
+        elif done:
+            reward = -1
+        elif prev_dist > self._food_dist:
+            reward = 0.1
+        else:
+            reward = -0.2
+
+        return self._state.copy(), reward, done, False, {"food": food_capture, "length": int(self.game.scalars[LENGTH])}
+
+    def reset(self, seed=None, options=None):
+        """
+        Method to start a new game
+        :param seed: seed for the food placement from now on, the generator continues when None
+        :param options: unused, part of the Gymnasium API
+        :return: (state, info)
+        """
+        if seed is not None:
+            self.seed(seed)
+
+        self.game.reset()
+        self._food_dist = self.game.observe(self._state)
+        return self._state.copy(), {"length": int(self.game.scalars[LENGTH])}
+
+    def seed(self, seed=None):
+        """
+        Method to seed the random number generator of this environment, which places the food
+        :param seed: the seed
+        :return: None
+        """
+        self.rng.seed(seed)
+
+    def get_state_size(self):
+        """
+        Method to retrieve the state size, used to initialize agent network
+        :return:
+        """
+        return len(self._state)
+
+    @property
+    def board(self):
+        """
+        The board of the game (0 empty, 1 snake, 2 food)
+        """
+        return self.game.board
@@ -0,0 +1,271 @@
+#
+# File: observations.py
+# Desc: Observation encoders that turn the board of a game into a richer state than the food angle
+#
+######################
+
+import numpy as np
+from snake_gym.config import EnvConfig
+from snake_gym.game.actions import Actions, AGENT_MOVE_DELTAS
+
+
+def _wrapped_coordinates(offsets, config: EnvConfig):
+    """
+    Function to precompute the board coordinates of a pattern of cells around the head for every direction
+    and every head coordinate, so encoding a state is a single gather without any arithmetic
+    :param offsets: the x and y offsets from the head for every direction [4 x ... x 2]
+    :param config: the configuration of the game
+    :return: (xs [4 x width x ...], ys [4 x height x ...]), indexed by [direction, head coordinate]
+    """
+    width, height = config.board_shape
+    extra = (None,) * (offsets.ndim - 2)
+    xs = (offsets[:, None, ..., 0] + np.arange(width)[(slice(None),) + extra]) % width
+    ys = (offsets[:, None, ..., 1] + np.arange(height)[(slice(None),) + extra]) % height
+
+    return xs.astype(np.intp), ys.astype(np.intp)
+
+
+class GridObservation:
+    """
+    The full board (0 empty, 1 snake, 2 food) in the dtype of the board
+    """
+
+    def __init__(self, config: EnvConfig):
+        """
+        Constructor
+        :param config: the configuration of the game
+        """
+        self.shape = config.board_shape
+        self.dtype = config.board_dtype
+
+        # the range of the values, for the observation space of the Gymnasium API
+        self.low, self.high = 0, 2
+
+    def __call__(self, board, head, direction):
+        """
+        Method to encode a single game
+        :param board: the board [width x height]
+        :param head: the coordinates of the head
+        :param direction: the direction of the snake as Actions value
+        :return: observation [width x height]
+        """
+        return board.copy()
+
+    def batch(self, boards, heads, directions):
+        """
+        Method to encode a batch of games
+        :param boards: the boards [batch_size x width x height]
+        :param heads: the coordinates of the heads [batch_size x 2]
+        :param directions: the directions of the snakes as Actions values [batch_size]
+        :return: observations [batch_size x width x height]
+        """
+        return boards.copy()
+
+
+class EgocentricObservation:
+    """
+    A size x size window of the board around the head, wrapping around the borders and turned
+    so the snake always looks up: the first row lies ahead of the snake, the last row behind it,
+    and the columns run from the side of the left action (2) to the side of the right action (0)
+    """
+
+    def __init__(self, config: EnvConfig, size=7):
+        """
+        Constructor
+        :param config: the configuration of the game
+        :param size: the width of the window, odd so the head is in the middle
+        """
+        if size % 2 == 0:
+            raise ValueError(f"The window size should be odd, got {size}")
+
+        self.shape = (size, size)
+        self.dtype = config.board_dtype
+        self.low, self.high = 0, 2
+
+        # for every direction, the x and y offsets from the head of every cell in the window [4 x size x size]
+        steps = np.arange(size) - size // 2
+        offsets = np.zeros((len(Actions), size, size, 2), dtype=np.int64)
+        for direction in Actions:
+            forward = AGENT_MOVE_DELTAS[direction.value, 1]
+            right = AGENT_MOVE_DELTAS[direction.value, 0]
+            offsets[direction.value] = -steps[:, None, None] * forward + steps[None, :, None] * right
+        self._xs, self._ys = _wrapped_coordinates(offsets, config)
+
+    def __call__(self, board, head, direction):
+        """
+        Method to encode a single game
+        :param board: the board [width x height]
+        :param head: the coordinates of the head
+        :param direction: the direction of the snake as Actions value
+        :return: observation [size x size]
+        """
+        return board[self._xs[direction, head[0]], self._ys[direction, head[1]]]
+
+    def batch(self, boards, heads, directions):
+        """
+        Method to encode a batch of games with a single gather
+        :param boards: the boards [batch_size x width x height]
+        :param heads: the coordinates of the heads [batch_size x 2]
+        :param directions: the directions of the snakes as Actions values [batch_size]
+        :return: observations [batch_size x size x size]
+        """
+        xs = self._xs[directions, heads[:, 0]]
+        ys = self._ys[directions, heads[:, 1]]
+        return boards[np.arange(len(boards))[:, None, None], xs, ys]
+
+
+class RayObservation:
+    """
+    The distance from the head to the body along 8 rays, seen from the direction of the snake:
+    ahead, ahead right, right, behind right, behind, behind left, left and ahead left.
+    Distances are divided by one more than the length of the rays, so they are 1 when no body part is in reach.
+    The rays are shorter than the board, so they never wrap around to the head
+    """
+
+    def __init__(self, config: EnvConfig):
+        """
+        Constructor
+        :param config: the configuration of the game
+        """
+        self.shape = (8,)
+        self.dtype = np.float32
+        self.low, self.high = 0, 1
+        self._reach = min(config.board_shape) - 1
+
+        # for every direction, the x and y offsets of the cells along every ray [4 x 8 x reach]
+        steps = np.arange(1, self._reach + 1)[:, None]
+        offsets = np.zeros((len(Actions), 8, self._reach, 2), dtype=np.int64)
+        for direction in Actions:
+            forward = AGENT_MOVE_DELTAS[direction.value, 1]
+            right = AGENT_MOVE_DELTAS[direction.value, 0]
+            rays = [forward, forward + right, right, right - forward,
+                    -forward, -forward - right, -right, forward - right]
+            offsets[direction.value] = [steps * ray for ray in rays]
+        self._xs, self._ys = _wrapped_coordinates(offsets, config)
+
+        # the normalized distance of every step along a ray
+        self._distance = (np.arange(1, self._reach + 1) / (self._reach + 1)).astype(np.float32)
+
+    def __call__(self, board, head, direction):
+        """
+        Method to encode a single game
+        :param board: the board [width x height]
+        :param head: the coordinates of the head
+        :param direction: the direction of the snake as Actions value
+        :return: observation [8]
+        """
+        return self._distances(board[self._xs[direction, head[0]], self._ys[direction, head[1]]] == 1)
+
+    def batch(self, boards, heads, directions):
+        """
+        Method to encode a batch of games with a single gather
+        :param boards: the boards [batch_size x width x height]
+        :param heads: the coordinates of the heads [batch_size x 2]
+        :param directions: the directions of the snakes as Actions values [batch_size]
+        :return: observations [batch_size x 8]
+        """
+        xs = self._xs[directions, heads[:, 0]]
+        ys = self._ys[directions, heads[:, 1]]
+        return self._distances(boards[np.arange(len(boards))[:, None, None], xs, ys] == 1)
+
+    def _distances(self, hits):
+        """
+        Private method to turn the body cells along the rays into normalized distances
+        :param hits: whether every cell along the rays holds a body part [... x 8 x reach]
+        :return: distances [... x 8]
+        """
+        return np.where(hits, self._distance, np.float32(1)).min(axis=-1)
+
+
+class FrameStack:
+    """
+    The last num_frames observations of one game, or of a batch of games, stacked along a new axis.
+    Every frame is written twice into a buffer of 2 * num_frames frames, so the last num_frames
+    frames are always a contiguous slice of the buffer and are returned without copying.
+    The returned view changes with the next push, so copy it to keep it
+    """
+
+    def __init__(self, num_frames, shape, dtype, num_envs=None):
+        """
+        Constructor
+        :param num_frames: the number of frames to stack
+        :param shape: the shape of a single observation
+        :param dtype: the dtype of the observations
+        :param num_envs: the number of games in a batch, None for a single game
+        """
+        self.num_frames = num_frames
+        self.batched = num_envs is not None
+        self._position = 0
+
+        # the frame axis comes after the batch axis
+        batch_shape = (num_envs,) if self.batched else ()
+        self._buffer = np.zeros(batch_shape + (2 * num_frames,) + tuple(shape), dtype=dtype)
+
+    def reset(self, frame, games=None):
+        """
+        Method to fill the stack with the first observation of a game
+        :param frame: the observation, or the observations of the given games
+        :param games: the indices of the games to reset in a batch, None for all
+        :return: the stacked frames
+        """
+        if not self.batched:
+            self._buffer[:] = frame
+        elif games is None:
+            self._buffer[:] = frame[:, None]
+        else:
+            self._buffer[games] = frame[:, None]
+
+        return self.frames()
+
+    def push(self, frame):
+        """
+        Method to add the newest observation
+        :param frame: the observation, or the observations of all games in a batch
+        :return: the stacked frames
+        """
+        n = self.num_frames
+        self._position = (self._position + 1) % n
+
+        # the newest frame goes at the end of the slice that starts at the oldest frame
+        position = self._position + n - 1
+        if self.batched:
+            self._buffer[:, position] = frame
+            self._buffer[:, position - n if position >= n else position + n] = frame
+        else:
+            self._buffer[position] = frame
+            self._buffer[position - n if position >= n else position + n] = frame
+
+        return self.frames()
+
+    def frames(self):
+        """
+        Method to get a view of the stacked frames, oldest first
+        :return: frames [num_frames x ...] or [num_envs x num_frames x ...]
+        """
+        window = slice(self._position, self._position + self.num_frames)
+        return self._buffer[:, window] if self.batched else self._buffer[window]
+
+
+# the encoders that can be selected by name
+OBSERVATIONS = {
+    "grid": GridObservation,
+    "egocentric": EgocentricObservation,
+    "rays": RayObservation,
+}
+
+
+def make_observation(observation, config: EnvConfig, **kwargs):
+    """
+    Function to create an observation encoder
+    :param observation: the name of the encoder in OBSERVATIONS, or an encoder
+    :param config: the configuration of the game
+    :param kwargs: additional arguments for the encoder, e.g. the size of the egocentric window
+    :return: the encoder
+    """
+    if not isinstance(observation, str):
+        return observation
+
+    if observation not in OBSERVATIONS:
+        raise ValueError(f"Unknown observation {observation!r}, choose from {list(OBSERVATIONS)}")
+
+    return OBSERVATIONS[observation](config, **kwargs)
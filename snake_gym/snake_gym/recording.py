@@ -0,0 +1,275 @@
+#
+# File: recording.py
+# Desc: Recording of episodes to an append-only file, and a player that re-simulates, draws or exports them
+#
+######################
+
+import argparse
+import os
+import time
+import numpy as np
+from snake_gym.config import EnvConfig
+from snake_gym.game.colors import Colors
+
+# every episode is stored as a header, followed by the snapshot of its first state and its actions as uint8
+EPISODE_MAGIC = 0x534E4B45  # "SNKE"
+EPISODE_VERSION = 1
+EPISODE_HEADER = np.dtype([("magic", "<u4"), ("version", "<u4"), ("snapshot_size", "<u4"), ("length", "<u4"),
+                           ("reward", "<f8"), ("terminated", "u1"), ("human_player", "u1")])
+
+
+class EpisodeRecorder:
+    """
+    Records the episodes of an Env to an append-only file. An episode is stored as the snapshot of the
+    game at its start and the actions taken, which is enough to re-simulate it exactly, so a step costs
+    no more than appending its action to a buffer. The episode is written in one go when it ends
+    """
+
+    def __init__(self, filepath):
+        """
+        Constructor
+        :param filepath: the file to append the episodes to, created if it doesn't exist
+        """
+        self.filepath = filepath
+        self._file = open(filepath, "ab")
+
+        # the episode being recorded
+        self._snapshot = None
+        self._human_player = False
+        self._actions = bytearray()
+        self._reward = 0.0
+
+    def start(self, env):
+        """
+        Method to start recording an episode from the current state of an env, the episode
+        that was being recorded is written as cut off
+        :param env: the Env
+        """
+        self.finish(terminated=False)
+
+        # steps taken after the last episode ended, before this one started, are dropped
+        self._actions = bytearray()
+        self._reward = 0.0
+        self._snapshot = env.get_state_snapshot()
+        self._human_player = env.human_player
+
+    def step(self, action, reward, done):
+        """
+        Method to record a step, the episode is written when it ended
+        :param action: the action as an integer
+        :param reward: the reward of the step
+        :param done: whether the episode ended
+        """
+        self._actions.append(action)
+        self._reward += reward
+
+        if done:
+            self.finish(terminated=True)
+
+    def finish(self, terminated):
+        """
+        Method to write the episode that is being recorded, if any, episodes without steps are dropped
+        :param terminated: whether the game ended, False if it was cut off
+        """
+        if self._snapshot is None or not self._actions:
+            return
+
+        header = np.array([(EPISODE_MAGIC, EPISODE_VERSION, len(self._snapshot), len(self._actions), self._reward,
+                            terminated, self._human_player)], dtype=EPISODE_HEADER)
+
+        # a single write per episode, flushed so the file can be played while recording goes on
+        self._file.write(header.tobytes() + self._snapshot + self._actions)
+        self._file.flush()
+
+        self._snapshot = None
+        self._actions = bytearray()
+        self._reward = 0.0
+
+    def close(self):
+        """
+        Method to write the episode that is being recorded as cut off and close the file
+        """
+        if self._file.closed:
+            return
+
+        self.finish(terminated=False)
+        self._file.close()
+
+
+class EpisodePlayer:
+    """
+    Reads a file written by an EpisodeRecorder through a memory map, and re-simulates, draws or
+    exports its episodes. An episode that is still being written is left out
+    """
+
+    def __init__(self, filepath):
+        """
+        Constructor
+        :param filepath: the recorded file
+        """
+        # an empty file can't be memory mapped
+        if os.path.getsize(filepath) == 0:
+            self.data = np.zeros(0, dtype=np.uint8)
+        else:
+            self.data = np.memmap(filepath, dtype=np.uint8, mode="r")
+
+        # index the episodes by walking the headers
+        offsets, headers = [], []
+        offset = 0
+        while offset + EPISODE_HEADER.itemsize <= len(self.data):
+            header = self.data[offset:offset + EPISODE_HEADER.itemsize].view(EPISODE_HEADER)[0]
+            if header["magic"] != EPISODE_MAGIC or header["version"] != EPISODE_VERSION:
+                raise ValueError(f"{filepath} is not an episode recording of version {EPISODE_VERSION}, "
+                                 f"or it is corrupt at byte {offset}")
+
+            end = offset + EPISODE_HEADER.itemsize + int(header["snapshot_size"]) + int(header["length"])
+            if end > len(self.data):
+                break
+
+            offsets.append(offset)
+            headers.append(header)
+            offset = end
+
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.episodes = np.array(headers, dtype=EPISODE_HEADER)
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def snapshot(self, episode):
+        """
+        Method to read the snapshot of the first state of an episode
+        :param episode: the index of the episode
+        :return: snapshot as bytes, see Env.restore
+        """
+        start = self.offsets[episode] + EPISODE_HEADER.itemsize
+        return self.data[start:start + int(self.episodes[episode]["snapshot_size"])].tobytes()
+
+    def actions(self, episode):
+        """
+        Method to read the actions of an episode
+        :param episode: the index of the episode
+        :return: actions [length] as a view of the file
+        """
+        start = self.offsets[episode] + EPISODE_HEADER.itemsize + int(self.episodes[episode]["snapshot_size"])
+        return self.data[start:start + int(self.episodes[episode]["length"])]
+
+    def replay(self, episode):
+        """
+        Generator re-simulating an episode, which yields (env, reward, done) at the start, with a reward
+        of None, and after every step. The env is the same object every time, so copy what should be
+        kept, e.g. env.world.board.copy()
+        :param episode: the index of the episode
+        """
+        from snake_gym.env import Env, SNAPSHOT_HEADER
+
+        # the board size is in the header of the snapshot
+        snapshot = self.snapshot(episode)
+        header = dict(zip(SNAPSHOT_HEADER, np.frombuffer(snapshot, dtype=np.int32, count=len(SNAPSHOT_HEADER))))
+        config = EnvConfig(width=int(header["width"]), height=int(header["height"]))
+
+        env = Env(human_player=bool(self.episodes[episode]["human_player"]), config=config, headless=True)
+        env.restore(snapshot)
+        yield env, None, False
+
+        for action in self.actions(episode).tolist():
+            _, reward, done, _, _ = env.step(action)
+            yield env, reward, done
+
+    def play(self, episode, fps=10):
+        """
+        Method to draw an episode in the pygame window
+        :param episode: the index of the episode
+        :param fps: the number of steps per second, None to play as fast as possible
+        """
+        import pygame
+        clock = pygame.time.Clock()
+
+        for env, _, _ in self.replay(episode):
+            env.render()
+            pygame.event.pump()
+            if fps is not None:
+                clock.tick(fps)
+
+    def to_gif(self, episode, filepath, fps=10, cell_size=10):
+        """
+        Method to export an episode as an animated GIF, in the colors of the pygame window. Needs Pillow
+        :param episode: the index of the episode
+        :param filepath: the .gif file
+        :param fps: the number of steps per second
+        :param cell_size: the width of a cell in pixels
+        """
+        try:
+            from PIL import Image
+        except ImportError as e:
+            raise ImportError("Exporting a GIF needs Pillow, install it with pip install snake_gym/[gif]") from e
+
+        # the board values index a palette, and cells are drawn with a gap of 2 pixels as in the window
+        palette = list(Colors.BLACK + Colors.WHITE + Colors.RED)
+        gap = min(2, cell_size - 1)
+        pattern = np.zeros((cell_size, cell_size), dtype=np.uint8)
+        pattern[:cell_size - gap, :cell_size - gap] = 1
+
+        frames = []
+        for env, _, _ in self.replay(episode):
+            pixels = np.kron(env.world.board.T.astype(np.uint8), pattern)
+            frame = Image.fromarray(pixels, mode="P")
+            frame.putpalette(palette)
+            frames.append(frame)
+
+        frames[0].save(filepath, save_all=True, append_images=frames[1:], duration=int(1000 / fps), loop=0)
+
+    def check(self, episode):
+        """
+        Method to re-simulate an episode and check it ends as recorded
+        :param episode: the index of the episode
+        :return: whether the reward and the end of the game match the recording
+        """
+        total, ended = 0.0, False
+        for _, reward, done in self.replay(episode):
+            total += reward or 0
+            ended = done
+
+        recorded = self.episodes[episode]
+        return bool(np.isclose(total, recorded["reward"]) and ended == bool(recorded["terminated"]))
+
+
+def main():
+    """
+    Main function listing, playing or exporting the episodes of a recording
+    """
+    parser = argparse.ArgumentParser(description="Play recorded episodes")
+    parser.add_argument("recording", help="file written with Env(record=...) or Env.record")
+    parser.add_argument("--episode", type=int, default=-1, help="index of the episode, the last one by default")
+    parser.add_argument("--fps", type=float, default=10, help="steps per second, 0 plays as fast as possible")
+    parser.add_argument("--gif", help="export the episode to this GIF instead of playing it")
+    parser.add_argument("--list", action="store_true", help="list the episodes")
+    args = parser.parse_args()
+
+    player = EpisodePlayer(args.recording)
+    if len(player) == 0:
+        parser.error("recording contains no episodes")
+
+    if args.list:
+        print(f"{'episode':>8} {'steps':>8} {'reward':>8} {'ended':>8}")
+        for i, episode in enumerate(player.episodes):
+            print(f"{i:>8} {episode['length']:>8} {episode['reward']:>8.1f} "
+                  f"{'collided' if episode['terminated'] else 'cut off':>8}")
+        return
+
+    # negative indices count from the end, as in a list
+    if not -len(player) <= args.episode < len(player):
+        parser.error(f"--episode {args.episode} is out of range, the recording has {len(player)} episodes")
+    episode = args.episode % len(player)
+    if args.gif is not None:
+        player.to_gif(episode, args.gif, fps=args.fps or 10)
+        return
+
+    start = time.perf_counter()
+    player.play(episode, fps=args.fps or None)
+    print(f"played episode {episode} ({player.episodes[episode]['length']} steps) "
+          f"in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
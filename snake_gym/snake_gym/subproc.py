@@ -0,0 +1,225 @@
+#
+# File: subproc.py
+# Desc: A batch of Env games spread over worker processes that write their results to shared memory
+#
+######################
+
+import multiprocessing as mp
+import os
+import numpy as np
+from snake_gym.config import EnvConfig
+from snake_gym.env import Env
+
+# the commands a worker receives, followed by the actions or the games to reset as int64
+STEP, RESET, CLOSE = b"s", b"r", b"c"
+
+
+class SubprocVectorEnv:
+    """
+    A batch of agent games played by Env instances in worker processes, with the interface of VectorEnv.
+
+    Every worker plays a contiguous slice of the games. The states, rewards and dones live in a single
+    block of shared memory that the workers write their slice of directly, so a step only sends the
+    actions of a worker as raw bytes through its pipe and receives an empty reply, nothing is pickled.
+    Games that end are reset automatically.
+    """
+
+    def __init__(self, num_envs, num_workers=None, config: EnvConfig = None, seed=None, observation=None,
+                 frames=1):
+        """
+        Constructor
+        :param num_envs: the number of games that are played at the same time
+        :param num_workers: the number of worker processes, defaults to one per core
+        :param config: the configuration of every game, defaults to EnvConfig()
+        :param seed: seed for the food placement, game i is seeded with seed + i
+        :param observation: None for the food angle and neighbour states, otherwise the name of an
+                            encoder in snake_gym.observations.OBSERVATIONS
+        :param frames: the number of observations to stack, only used with an observation encoder
+        """
+        self.num_envs = num_envs
+        self.num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+        self.config = config or EnvConfig()
+        env_kwargs = {"config": self.config, "observation": observation, "frames": frames}
+
+        # the shape and dtype of a state, taken from a game in this process
+        state, _ = Env(human_player=False, headless=True, **env_kwargs).reset()
+        self._shape = state.shape
+        self._dtype = state.dtype
+
+        # a single shared block holding the states, rewards and dones of all games, each aligned to 8 bytes
+        ctx = mp.get_context("spawn")
+        layout = [((num_envs,) + self._shape, self._dtype), ((num_envs,), np.float32), ((num_envs,), np.bool_)]
+        sizes = [-(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8 for shape, dtype in layout]
+        self._buffer = ctx.RawArray("b", max(sum(sizes), 1))
+        self._states, self._rewards, self._dones = _views(self._buffer, layout)
+
+        # every worker plays a contiguous slice of the games
+        self._slices = [(games[0], games[-1] + 1) for games in np.array_split(np.arange(num_envs), self.num_workers)]
+        self._pipes, self._workers = [], []
+        for start, stop in self._slices:
+            pipe, worker_pipe = ctx.Pipe()
+            seeds = [None if seed is None else seed + game for game in range(start, stop)]
+            worker = ctx.Process(target=_run_worker, args=(worker_pipe, self._buffer, layout, start, stop, seeds,
+                                                           env_kwargs), daemon=True)
+            worker.start()
+            worker_pipe.close()
+            self._pipes.append(pipe)
+            self._workers.append(worker)
+
+        self.closed = False
+        self._receive()
+
+    def reset(self):
+        """
+        Method to reset all games and retrieve the first states
+        :return: states [num_envs x ...]
+        """
+        return self.reset_games(np.arange(self.num_envs))
+
+    def step(self, actions):
+        """
+        Method to perform an action in every game
+        Games that end are reset, so the state returned for such a game is the first state of its next game.
+        :param actions: the relative actions to perform [num_envs]
+        :return: (states [num_envs x ...], rewards [num_envs], dones [num_envs])
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+
+        # all workers step their games at the same time
+        for pipe, (start, stop) in zip(self._pipes, self._slices):
+            pipe.send_bytes(STEP + actions[start:stop].tobytes())
+        self._receive()
+
+        return self._states.copy(), self._rewards.copy(), self._dones.copy()
+
+    def reset_games(self, games):
+        """
+        Method to start a new game for a selection of the games, e.g. when an episode is cut off
+        :param games: the indices of the games to reset
+        :return: the first states of the new games
+        """
+        games = np.asarray(games, dtype=np.int64)
+
+        # every worker resets its own games, by their index in its slice
+        busy = []
+        for pipe, (start, stop) in zip(self._pipes, self._slices):
+            local = games[(games >= start) & (games < stop)] - start
+            if local.size:
+                pipe.send_bytes(RESET + local.tobytes())
+                busy.append(pipe)
+        self._receive(busy)
+
+        return self._states[games].copy()
+
+    def get_state_size(self):
+        """
+        Method to retrieve the state size, used to initialize agent network
+        :return:
+        """
+        return int(np.prod(self._shape))
+
+    def get_observation_shape(self):
+        """
+        Method to retrieve the shape of the state of a single game
+        :return: shape as tuple
+        """
+        return self._shape
+
+    def close(self):
+        """
+        Method to stop the workers
+        :return: None
+        """
+        if self.closed:
+            return
+
+        # a worker that failed has already stopped and closed its end of the pipe
+        for pipe in self._pipes:
+            try:
+                pipe.send_bytes(CLOSE)
+            except OSError:
+                pass
+
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _receive(self, pipes=None):
+        """
+        Private method to wait until the workers have written their results
+        :param pipes: the pipes of the workers to wait for, defaults to all
+        """
+        for pipe in self._pipes if pipes is None else pipes:
+            error = pipe.recv_bytes()
+            if error:
+                self.close()
+                raise RuntimeError(f"A worker of the SubprocVectorEnv failed: {error.decode()}")
+
+
+def _views(buffer, layout):
+    """
+    Private function to create the NumPy arrays of a shared block
+    :param buffer: the shared memory
+    :param layout: the (shape, dtype) of every array, in order
+    :return: list of arrays
+    """
+    views, offset = [], 0
+    for shape, dtype in layout:
+        count = int(np.prod(shape))
+        views.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape))
+        offset += -(-count * np.dtype(dtype).itemsize // 8) * 8
+
+    return views
+
+
+def _run_worker(pipe, buffer, layout, start, stop, seeds, env_kwargs):
+    """
+    Private function that runs in a worker process, it plays games start to stop and writes
+    their states, rewards and dones to the shared block after every command
+    :param pipe: the pipe to the SubprocVectorEnv, which sends a command byte followed by int64 data,
+                 and receives nothing when the command succeeded or the error otherwise
+    :param buffer: the shared memory
+    :param layout: the (shape, dtype) of the states, rewards and dones
+    :param start: the index of the first game of this worker
+    :param stop: one more than the index of the last game of this worker
+    :param seeds: the seed of every game
+    :param env_kwargs: the arguments of every Env
+    """
+    states, rewards, dones = (view[start:stop] for view in _views(buffer, layout))
+
+    try:
+        envs = [Env(human_player=False, headless=True, seed=seed, **env_kwargs) for seed in seeds]
+        for i, env in enumerate(envs):
+            states[i], _ = env.reset()
+        pipe.send_bytes(b"")
+
+        while True:
+            message = pipe.recv_bytes()
+            command, data = message[:1], np.frombuffer(message, dtype=np.int64, offset=1)
+
+            if command == STEP:
+                for i, (env, action) in enumerate(zip(envs, data.tolist())):
+                    state, rewards[i], dones[i], _, _ = env.step(action)
+
+                    # start a new game when the snake collided
+                    states[i] = env.reset()[0] if dones[i] else state
+
+            elif command == RESET:
+                for i in data.tolist():
+                    states[i], _ = envs[i].reset()
+
+            elif command == CLOSE:
+                return
+
+            pipe.send_bytes(b"")
+
+    except Exception as e:
+        pipe.send_bytes(repr(e).encode())
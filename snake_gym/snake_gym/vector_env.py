@@ -0,0 +1,293 @@
+#
+# File: vector_env.py
+# Desc: A batch of snake games stepped together as NumPy arrays
+#
+######################
+
+import time
+import numpy as np
+from snake_gym.config import EnvConfig
+from snake_gym.game.actions import Actions, AGENT_MOVE_DELTAS, AGENT_MOVE_DIRECTIONS
+from snake_gym.game.geometry import food_deltas, food_angles
+from snake_gym.observations import make_observation, FrameStack
+
+
+class VectorEnv:
+    """
+    A batch of Snake games for agents, stored as stacked arrays.
+
+    Every game keeps a board (0 empty, 1 snake, 2 food), a ring buffer with
+    its body coordinates and its head, direction, length and food location.
+    A step moves all snakes at once and games that end are reset automatically.
+    """
+
+    def __init__(self, num_envs, config: EnvConfig = None, seed=None, observation=None, frames=1):
+        """
+        Constructor
+        :param num_envs: the number of games that are played at the same time
+        :param config: the configuration of every game, defaults to EnvConfig()
+        :param seed: seed for the food placement
+        :param observation: None for the food angle and neighbour states, otherwise the name of an
+                            encoder in snake_gym.observations.OBSERVATIONS or an encoder
+        :param frames: the number of observations to stack, only used with an observation encoder
+        """
+        self.num_envs = num_envs
+        self.config = config or EnvConfig()
+        self.width = width = self.config.width
+        self.height = height = self.config.height
+        self.initial_length = self.config.initial_length
+        self.start = np.array(self.config.start_position)
+        self.rng = np.random.default_rng(seed)
+
+        # the snake can never be longer than the board, so that is the capacity of the ring buffer
+        self.capacity = width * height
+        self._shape = np.array([width, height])
+        self._games = np.arange(num_envs)
+
+        # game state
+        self.board = np.zeros((num_envs, width, height), dtype=self.config.board_dtype)
+        self.body = np.zeros((num_envs, self.capacity, 2), dtype=np.int16)
+        self.head_slot = np.zeros(num_envs, dtype=np.int64)
+        self.count = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.zeros(num_envs, dtype=np.int64)
+        self.head = np.zeros((num_envs, 2), dtype=np.int64)
+        self.direction = np.zeros(num_envs, dtype=np.int64)
+        self.food = np.zeros((num_envs, 2), dtype=np.int64)
+
+        # cached information about the current states
+        self._states = np.zeros((num_envs, 4), dtype=np.float32)
+        self._food_dist = np.zeros(num_envs)
+
+        # the observation encoder and the stacks of its last frames, if any
+        self.observation = None if observation is None else make_observation(observation, self.config)
+        self._frames = None
+        if self.observation is not None and frames > 1:
+            self._frames = FrameStack(frames, self.observation.shape, self.observation.dtype, num_envs)
+
+        # the function the seconds spent computing every batch of states are reported to, if any
+        self._observe_timer = None
+
+        self.reset()
+
+    def reset(self):
+        """
+        Method to reset all games and retrieve the first states
+        :return: states [num_envs x ...]
+        """
+        self._reset_games(self._games)
+        return self._observe(reset=self._games)
+
+    def step(self, actions):
+        """
+        Method to perform an action in every game
+        Games that end are reset, so the state returned for such a game is the first state of its next game.
+        :param actions: the relative actions to perform [num_envs]
+        :return: [next_states, rewards, dones]
+        """
+        games = self._games
+        actions = np.asarray(actions, dtype=np.int64)
+
+        # turn and move the heads, wrapping around the borders
+        delta = AGENT_MOVE_DELTAS[self.direction, actions]
+        self.direction = AGENT_MOVE_DIRECTIONS[self.direction, actions]
+        head = (self.head + delta) % self._shape
+
+        # the tail leaves its cell, unless the snake is still growing
+        grow = self.count < self.length
+        shrink = games[~grow]
+        tail = self.body[shrink, (self.head_slot[shrink] - self.count[shrink] + 1) % self.capacity]
+        self.board[shrink, tail[:, 0], tail[:, 1]] = 0
+        self.count[grow] += 1
+
+        # check for collisions and food before the head takes its new cell
+        collided = self.board[games, head[:, 0], head[:, 1]] == 1
+        ate = (head == self.food).all(axis=1)
+
+        # place the new head
+        self.head_slot = (self.head_slot + 1) % self.capacity
+        self.body[games, self.head_slot] = head
+        self.board[games, head[:, 0], head[:, 1]] = 1
+        self.head = head
+
+        # grow the snakes that ate and give them new food
+        eaters = games[ate]
+        self.length[eaters] += 1
+        self._place_food(eaters)
+
+        # moving closer to food is rewarded, moving away is punished
+        prev_dist = self._food_dist.copy()
+        self._update_states(games)
+        rewards = np.where(self._food_dist < prev_dist, 0.1, -0.2)
+        rewards[collided] = -1
+        rewards[ate] = 1
+
+        # start a new game wherever the snake collided
+        dones = collided
+        self._reset_games(games[dones])
+
+        return self._observe(reset=games[dones], push=True), rewards.astype(np.float32), dones
+
+    def reset_games(self, games):
+        """
+        Method to start a new game for a selection of the games, e.g. when an episode is cut off
+        :param games: the indices of the games to reset
+        :return: the first states of the new games
+        """
+        games = np.asarray(games, dtype=np.int64)
+        self._reset_games(games)
+
+        if self.observation is None:
+            return self._states[games].copy()
+
+        # only the reset games are encoded
+        frames = self.observation.batch(self.board[games], self.head[games], self.direction[games])
+        if self._frames is None:
+            return frames
+
+        return self._frames.reset(frames, games)[games].copy()
+
+    def get_state_size(self):
+        """
+        Method to retrieve the state size, used to initialize agent network
+        :return:
+        """
+        return int(np.prod(self.get_observation_shape()))
+
+    def get_observation_shape(self):
+        """
+        Method to retrieve the shape of the state of a single game
+        :return: shape as tuple
+        """
+        if self.observation is None:
+            return self._states.shape[1:]
+
+        if self._frames is None:
+            return tuple(self.observation.shape)
+
+        return (self._frames.num_frames,) + tuple(self.observation.shape)
+
+    def time_observations(self, timer):
+        """
+        Method to report the time spent computing the states, e.g. to profile training
+        :param timer: function called with the seconds of every batch of states, None to stop
+        :return: None
+        """
+        self._observe_timer = timer
+
+    def _observe(self, reset, push=False):
+        """
+        Private method to compute the states that are returned to the agent, timed if requested
+        :param reset: the indices of the games that just started, their stacks are filled with their first frame
+        :param push: whether all games moved, so their newest frames are pushed onto the stacks
+        :return: states [num_envs x ...]
+        """
+        if self._observe_timer is None:
+            return self._encode(reset, push)
+
+        start = time.perf_counter()
+        states = self._encode(reset, push)
+        self._observe_timer(time.perf_counter() - start)
+        return states
+
+    def _encode(self, reset, push):
+        """
+        Private method to compute the states that are returned to the agent
+        :param reset: the indices of the games that just started, their stacks are filled with their first frame
+        :param push: whether all games moved, so their newest frames are pushed onto the stacks
+        :return: states [num_envs x ...]
+        """
+        if self.observation is None:
+            return self._states.copy()
+
+        frames = self.observation.batch(self.board, self.head, self.direction)
+        if self._frames is None:
+            return frames
+
+        if push:
+            self._frames.push(frames)
+        if reset.size:
+            self._frames.reset(frames[reset], reset)
+
+        return self._frames.frames().copy()
+
+    def _reset_games(self, games):
+        """
+        Private method to start a new game for a selection of the games
+        :param games: the indices of the games to reset
+        """
+        if not games.size:
+            return
+
+        self.board[games] = 0
+        self.head[games] = self.start
+        self.body[games, 0] = self.start
+        self.head_slot[games] = 0
+        self.count[games] = 1
+        self.length[games] = self.initial_length
+        self.direction[games] = Actions.RIGHT.value
+        self.board[games, self.start[0], self.start[1]] = 1
+
+        self._place_food(games)
+        self._update_states(games)
+
+    def _place_food(self, games):
+        """
+        Private method to place food on a random empty cell for a selection of the games
+        :param games: the indices of the games that need new food
+        """
+
+        # guess random cells and retry the games for which the guess was occupied
+        pending = games
+        for _ in range(8):
+            if not pending.size:
+                return
+
+            cells = self.rng.integers(0, self.capacity, size=pending.size)
+            x, y = cells // self.height, cells % self.height
+            free = self.board[pending, x, y] == 0
+
+            self._set_food(pending[free], x[free], y[free])
+            pending = pending[~free]
+
+        # crowded boards get an exact draw from their empty cells
+        for game in pending:
+            cell = self.rng.choice(np.flatnonzero(self.board[game] == 0))
+            self._set_food(np.array([game]), cell // self.height, cell % self.height)
+
+    def _set_food(self, games, x, y):
+        """
+        Private method to put food on the board
+        :param games: the indices of the games
+        :param x: the x coordinates of the food
+        :param y: the y coordinates of the food
+        """
+        self.food[games, 0] = x
+        self.food[games, 1] = y
+        self.board[games, x, y] = 2
+
+    def _update_states(self, games):
+        """
+        Private method to compute the states of a selection of the games
+        The state of a game matches the one of Env:
+            [
+                Angle of head to fruit,
+                left neighbour,
+                top neighbour,
+                right neighbour
+            ]
+        :param games: the indices of the games
+        """
+        head = self.head[games]
+        direction = self.direction[games]
+
+        # the food can be closer when crossing a border
+        deltas = food_deltas(head, self.food[games], self.width, self.height)
+        self._food_dist[games] = np.sqrt((deltas ** 2).sum(axis=1))
+
+        # angle of the head to the closest food, seen from the direction of the snake
+        self._states[games, 0] = food_angles(deltas, direction)
+
+        # check if we would collide upon taking any of the actions
+        for action in range(3):
+            neighbour = (head + AGENT_MOVE_DELTAS[direction, action]) % self._shape
+            self._states[games, action + 1] = self.board[games, neighbour[:, 0], neighbour[:, 1]] == 1
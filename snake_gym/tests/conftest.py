@@ -0,0 +1,10 @@
+#
+# File: tests/conftest.py
+# Desc: Makes the snake_gym package importable when the tests run from anywhere, without installing it
+#
+#####################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,18 @@
+#
+# File: tests/test_kernel.py
+# Desc: Parity tests of the compiled step kernel against the Python Env
+#
+#####################################################
+
+import pytest
+from snake_gym.benchmarks.kernel import CONFIGS, check_parity
+
+SEEDS = [0, 1, 2]
+STEPS = 3000
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("config", CONFIGS, ids=lambda config: f"{config.width}x{config.height}")
+def test_kernel_parity(config, seed):
+    # check_parity raises on the first step, state, reward, board or food that differs
+    assert check_parity(config, seed, STEPS) >= 1
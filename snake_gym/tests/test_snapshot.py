@@ -0,0 +1,65 @@
+#
+# File: tests/test_snapshot.py
+# Desc: Round-trip tests of Env.get_state_snapshot and Env.restore
+#
+#####################################################
+
+import random
+import numpy as np
+import pytest
+from snake_gym.config import EnvConfig
+from snake_gym.env import Env
+from snake_gym.game.actions import Actions
+
+CONFIG = EnvConfig(width=8, height=6)
+SEEDS = [0, 1, 2, 3]
+WARMUP = 5
+STEPS = 200
+
+
+def play(env, actions):
+    """
+    Function to play actions until they run out or the game ends
+    :param env: the env
+    :param actions: the actions
+    :return: list of (state, reward, done, food location, board) after every step
+    """
+    results = []
+    for action in actions:
+        state, reward, done, _, _ = env.step(action)
+        results.append((state.copy(), reward, done, list(env.world.food_location), env.world.board.copy()))
+        if done:
+            break
+
+    return results
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("human_player", [False, True], ids=["agent", "human"])
+def test_restore_replays_identically(human_player, seed):
+    rng = random.Random(seed)
+    choices = list(Actions) if human_player else [0, 1, 2]
+
+    # snapshot the game in the middle of an episode, with a rng that was already used
+    env = Env(human_player=human_player, config=CONFIG, headless=True, seed=seed)
+    env.reset()
+    state, _, done, _, _ = play(env, [rng.choice(choices) for _ in range(WARMUP)])[-1]
+    assert not done
+    snapshot = env.get_state_snapshot()
+
+    actions = [rng.choice(choices) for _ in range(STEPS)]
+    expected = play(env, actions)
+
+    # restoring both the same env and a fresh one continues the game exactly as before
+    for restored in [env, Env(human_player=human_player, config=CONFIG, headless=True, seed=seed + 1)]:
+        np.testing.assert_array_equal(restored.restore(snapshot), state)
+        results = play(restored, actions)
+        assert len(results) == len(expected)
+
+        for step, (result, target) in enumerate(zip(results, expected)):
+            np.testing.assert_array_equal(result[0], target[0], err_msg=f"state of step {step}")
+            assert result[1:4] == target[1:4], f"reward, done or food of step {step}"
+            np.testing.assert_array_equal(result[4], target[4], err_msg=f"board of step {step}")
+
+    # the food has to be placed again at least once to cover the random number generator
+    assert any(reward == 1 for _, reward, _, _, _ in expected)
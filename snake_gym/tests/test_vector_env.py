@@ -0,0 +1,72 @@
+#
+# File: tests/test_vector_env.py
+# Desc: Parity tests of the NumPy VectorEnv against the Python Env
+#
+#####################################################
+
+import random
+import numpy as np
+import pytest
+from snake_gym.config import EnvConfig
+from snake_gym.env import Env
+from snake_gym.vector_env import VectorEnv
+
+CONFIGS = [EnvConfig(), EnvConfig(width=5, height=4), EnvConfig(width=7, height=30, initial_length=6)]
+SEEDS = [0, 1, 2]
+NUM_ENVS = 4
+STEPS = 2000
+
+
+def sync_food(vector_env, game, env):
+    """
+    Function to move the food of a game of a VectorEnv to where an Env placed it, as both draw it
+    from their own random number generator
+    :param vector_env: the VectorEnv
+    :param game: the index of the game
+    :param env: the Env
+    :return: the state of the game with the moved food
+    """
+    board = vector_env.board[game]
+    board[board == 2] = 0
+
+    x, y = env.world.food_location
+    games = np.array([game])
+    vector_env._set_food(games, x, y)
+    vector_env._update_states(games)
+    return vector_env._states[game].copy()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("config", CONFIGS, ids=lambda config: f"{config.width}x{config.height}")
+def test_vector_env_parity(config, seed):
+    envs = [Env(human_player=False, config=config, headless=True, seed=seed * NUM_ENVS + i) for i in range(NUM_ENVS)]
+    vector_env = VectorEnv(NUM_ENVS, config, seed=seed)
+    actions = random.Random(seed)
+
+    vector_states = vector_env.reset()
+    for game, env in enumerate(envs):
+        state, _ = env.reset()
+        np.testing.assert_array_equal(sync_food(vector_env, game, env), state)
+
+    games = 0
+    for step in range(STEPS):
+        batch = [actions.randrange(3) for _ in envs]
+        vector_states, rewards, dones = vector_env.step(batch)
+
+        for game, (env, action) in enumerate(zip(envs, batch)):
+            state, reward, done, _, _ = env.step(action)
+            assert np.float32(reward) == rewards[game], f"step {step}, game {game}"
+            assert done == dones[game], f"step {step}, game {game}"
+
+            # the VectorEnv resets a game that ended by itself, and places food after eating or a reset
+            if done:
+                state, _ = env.reset()
+                games += 1
+            if done or reward == 1:
+                vector_states[game] = sync_food(vector_env, game, env)
+
+            np.testing.assert_array_equal(vector_states[game], state, err_msg=f"step {step}, game {game}")
+            np.testing.assert_array_equal(vector_env.board[game], env.world.board, err_msg=f"step {step}, game {game}")
+
+    # the games have to end now and then to cover the automatic reset
+    assert games > 0